@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+Benchmark of reading, sorting and serializing synthetic models.
+
+    python -m benchmarks.bench [--scales 1000 10000] [--repeat 3] [--json out.json]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from io import BytesIO
+from time import perf_counter
+
+from icr2model.model import Model
+
+from .synthetic import build_model
+
+STAGES = ('read', 'sorted(True)', 'sorted(False)', 'Body.to_bytes', 'Header.to_bytes')
+
+
+def read_model(data):
+    m = Model()
+    st = BytesIO(data)
+    m.header.read(st)
+    m.body.read(BytesIO(st.read()), m.header.root_offset)
+    return m
+
+
+def _stages(data):
+    m = read_model(data)
+    return (lambda: read_model(data),
+            lambda: m.body.flavors.sorted(True),
+            lambda: m.body.flavors.sorted(False),
+            lambda: m.body.to_bytes(),
+            lambda: m.header.to_bytes()), len(m.body.flavors)
+
+
+def _time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        t = perf_counter()
+        func()
+        best = min(best, perf_counter() - t)
+    return best
+
+
+def _peak_memory(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scales=(100, 1000, 10000), repeat=3, seed=0):
+    """
+
+    :param scales: See :class:`benchmarks.synthetic.SyntheticModel`
+    :param int repeat: Best time of ``repeat`` runs is reported
+    :param int seed:
+    :return: Result rows
+    :rtype: list[dict]
+    """
+    rows = []
+    for scale in scales:
+        for track in (False, True):
+            data = build_model(scale, track, seed)
+            funcs, num_flavors = _stages(data)
+            for stage, func in zip(STAGES, funcs):
+                t = _time(func, repeat)
+                rows.append({'model': 'track' if track else 'car',
+                             'scale': scale,
+                             'bytes': len(data),
+                             'flavors': num_flavors,
+                             'stage': stage,
+                             'seconds': t,
+                             'flavors_per_second': num_flavors / t if t else float('inf'),
+                             'peak_memory': _peak_memory(func)})
+    return rows
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m benchmarks.bench')
+    parser.add_argument('--scales', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to json file')
+    args = parser.parse_args(argv)
+    rows = run(args.scales, args.repeat, args.seed)
+    print('{:<6} {:>6} {:>9} {:>8} {:<16} {:>10} {:>12} {:>10}'.format(
+        'model', 'scale', 'bytes', 'flavors', 'stage', 'ms', 'flavors/s', 'peak KiB'))
+    for r in rows:
+        print('{model:<6} {scale:>6} {bytes:>9} {flavors:>8} {stage:<16} '
+              '{ms:>10.2f} {flavors_per_second:>12.0f} {kib:>10.0f}'.format(
+                  ms=r['seconds'] * 1000, kib=r['peak_memory'] / 1024, **r))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# coding: utf-8
+"""
+Synthetic car/track sized models for benchmarks
+"""
+import random
+from itertools import cycle
+
+from icr2model.flavor import build_flavor, Flavors
+from icr2model.model import Model
+
+__all__ = ['SyntheticModel', 'build_model']
+
+_BSP_CHILDREN = {5: 1, 6: 2, 7: 3, 8: 3, 9: 4, 10: 2}
+
+
+class SyntheticModel:
+    """
+    Builds flavors children first in the same layout as :meth:`icr2model.model.Model.sorted`
+    (vertices first, root last), so reading and sorting it without optimization
+    reproduces the same bytes.
+    """
+
+    def __init__(self, scale, track=False, seed=0):
+        """
+
+        :param int scale: Number of V02 vertices. Other flavors are scaled along.
+        :param bool track: A flag to build F16/F11/F17 LOD structure of track
+        :param int seed:
+        """
+        self.scale = scale
+        self.track = track
+        self._random = random.Random(seed)
+        self._offset = 0
+        self.flavors = {}  # type: dict[int, icr2model.flavor.flavor.Flavor]
+
+    def _add(self, type_, values1, values2=()):
+        f = build_flavor(type_, self._offset, values1=values1, values2=values2)
+        self.flavors[f.offset] = f
+        self._offset += f.length
+        return f.offset
+
+    def _coordinate(self):  # coarse grid to produce redundant vertices
+        return [self._random.randrange(-8, 8) * 1024 for _ in range(3)]
+
+    def _faces(self, num):
+        r = self._random
+        offsets = []
+        for _ in range(num):
+            if r.random() < 0.5:
+                vs = [next(self._v02s) for _ in range(3 + r.randrange(2))]
+                offsets.append(self._add(2, [0, r.randrange(256), len(vs) - 1], vs))
+            else:
+                vs = [next(self._v01s) for _ in range(3)]
+                offsets.append(self._add(1, [r.randrange(256), len(vs) - 1], vs))
+        return offsets
+
+    def _textured(self, num_faces):  # F04 > F11 > F01/F02
+        faces = self._faces(num_faces)
+        f11 = self._add(11, [len(faces)], faces)
+        return self._add(4, [self._random.randrange(16), 0], [f11])
+
+    def _bsp(self, depth):  # F05-F10 tree
+        if depth == 0:
+            return self._textured(3)
+        type_ = self._random.choice(sorted(_BSP_CHILDREN))
+        children = [self._bsp(depth - 1) for _ in range(_BSP_CHILDREN[type_])]
+        normal = [self._random.randrange(-1024, 1024) for _ in range(3)]
+        return self._add(type_, normal + [self._random.randrange(1 << 20), 0], children)
+
+    def _section(self):
+        r = self._random
+        near, middle, far = self._bsp(2), self._textured(2), self._textured(1)
+        switch = self._add(13, [next(self._v01s)], [4096, near, 1024, middle, 0, far])  # F13
+        leaves = [self._add(15, self._coordinate() + [0, 0, 0, r.randrange(8)]),
+                  self._add(18, [0, 0, r.randrange(4)]),
+                  self._add(3, [1, 2, 3]),
+                  self._add(14, [2], [1, 2, 3, 4])]
+        if self.track:
+            leaves.append(self._add(12, [1, 2, 3, 4]))
+        return self._add(11, [len(leaves) + 1], [switch] + leaves)
+
+    def build(self):
+        """
+
+        :return: Model (flavors have no parents, serialize and read it to get complete one)
+        :rtype: Model
+        """
+        r = self._random
+        v02s = [self._add(0, self._coordinate(), [r.randrange(64), r.randrange(64)])
+                for _ in range(self.scale)]
+        v01s = [self._add(0, self._coordinate()) for _ in range(max(1, self.scale // 2))]
+        self._v02s, self._v01s = cycle(v02s), cycle(v01s)
+        sections = [self._section() for _ in range(max(1, self.scale // 20))]
+        if self.track:  # F16 > F11 > F11(lod root) > F11(manager) + F17
+            managers = []
+            for s in sections:
+                managers.append(self._add(11, [1], [s]))
+                self._add(17, [1, 2, 3, 4])
+            lod_root = self._add(11, [len(managers)], managers)
+            next_ = self._add(11, [1], [lod_root])
+        else:  # F16 > F11
+            next_ = self._add(11, [len(sections)], sections)
+        root = self._add(16, [next_, 0], [])
+        m = Model()
+        m.body.flavors = Flavors(self.flavors)
+        m.header.root_offset = root
+        m.header.body_length = self._offset
+        num_files = max(1, self.scale // 100)
+        m.header.files = {ext: ['{}{:05}'.format(ext[0], i) for i in range(num_files)]
+                          for ext in ('mip', 'pmp', '3do')}
+        return m
+
+
+def build_model(scale, track=False, seed=0):
+    """
+
+    :param int scale: See :class:`SyntheticModel`
+    :param bool track:
+    :param int seed:
+    :return: Serialized model
+    :rtype: bytes
+    """
+    return SyntheticModel(scale, track, seed).build().to_bytes()
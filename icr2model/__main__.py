@@ -0,0 +1,49 @@
+# coding: utf-8
+import json
+import sys
+from argparse import ArgumentParser
+
+from .batch import process
+from .profile import Profiler
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m icr2model',
+                            description='Sort (and optimize) ICR2 3do files')
+    parser.add_argument('paths', nargs='+', help='3do files or glob patterns')
+    parser.add_argument('-o', '--output-dir', help='directory to write sorted files')
+    parser.add_argument('-j', '--workers', type=int, help='number of worker processes')
+    parser.add_argument('--no-optimize', dest='optimize', action='store_false',
+                        help='do not merge redundant flavors')
+    parser.add_argument('--merge-subgraphs', action='store_true',
+                        help='merge identical subgraphs as well as identical flavors')
+    parser.add_argument('--profile', metavar='JSON',
+                        help='write profiles of files and their aggregate to a json file')
+    args = parser.parse_args(argv)
+    total = total_saved = errors = 0
+    profiles = {}
+    print('{:>8} {:>8} {:>8} {:>10} {:>10} {:>8}  {}'.format(
+        'read', 'sort', 'write', 'in', 'out', 'saved', 'path'))
+    for r in process(args.paths, args.output_dir, args.workers, args.optimize,
+                     args.merge_subgraphs, bool(args.profile)):
+        total += 1
+        if r.profile:
+            profiles[r.path] = r.profile
+        if r.error:
+            errors += 1
+            print('{:>58}  {}: {}'.format('error', r.path, r.error))
+            continue
+        total_saved += r.saved
+        print('{:8.3f} {:8.3f} {:8.3f} {:10} {:10} {:8}  {}'.format(
+            r.read_time, r.sort_time, r.write_time,
+            r.input_size, r.output_size, r.saved, r.path))
+    print('{} files, {} errors, {} bytes saved'.format(total, errors, total_saved))
+    if args.profile:
+        with open(args.profile, 'w') as f:
+            json.dump({'files': profiles,
+                       'total': Profiler.aggregate(profiles.values())}, f, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# coding: utf-8
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from time import perf_counter
+
+from .model import Model
+from .profile import Profiler
+
+__all__ = ['Result', 'expand_paths', 'process_file', 'process']
+
+
+class Result(namedtuple('Result', ['path', 'output', 'error',
+                                   'read_time', 'sort_time', 'write_time',
+                                   'input_size', 'output_size', 'profile'])):
+    """
+    Result of processing a single file. Times are in seconds, sizes in bytes.
+    ``profile`` is a report of :class:`icr2model.profile.Profiler` if profiled.
+    """
+
+    @property
+    def saved(self):
+        """
+
+        :return: Bytes saved by sorting/optimizing
+        :rtype: int
+        """
+        return self.input_size - self.output_size if self.output_size else 0
+
+    @property
+    def total_time(self):
+        return self.read_time + self.sort_time + self.write_time
+
+
+def expand_paths(paths):
+    """
+
+    :param paths: File paths and/or glob patterns
+    :return: Sorted file paths without duplicates
+    :rtype: list[str]
+    """
+    found = set()
+    for p in paths:
+        found.update(map(os.path.normpath,
+                         glob(p, recursive=True) if any(c in p for c in '*?[') else [p]))
+    return sorted(found)
+
+
+def process_file(path, output=None, optimize=True, merge_subgraphs=False, profile=False):
+    """
+    Read, sort and serialize a model file.
+    Any exception is caught and reported with :attr:`Result.error`.
+
+    :param str path:
+    :param str output:
+        Output path (missing directories are created).
+        The model is serialized but not written if omitted.
+    :param bool optimize: See :meth:`icr2model.flavor.Flavors.sorted`
+    :param bool merge_subgraphs: See :meth:`icr2model.flavor.Flavors.sorted`
+    :param bool profile: A flag to profile processing
+    :rtype: Result
+    """
+    prof = Profiler() if profile else None
+    if prof is not None:
+        with prof:
+            r = process_file(path, output, optimize, merge_subgraphs)
+        return r._replace(profile=prof.report())
+    times = [0.0, 0.0, 0.0]
+    input_size = output_size = 0
+    try:
+        input_size = os.path.getsize(path)
+        t = perf_counter()
+        m = Model.open(path)
+        times[0] = perf_counter() - t
+        t = perf_counter()
+        m.sort(optimize, merge_subgraphs)
+        times[1] = perf_counter() - t
+        t = perf_counter()
+        b = m.to_bytes()
+        if output:
+            if os.path.dirname(output):
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+            with open(output, 'wb') as f:
+                f.write(b)
+        times[2] = perf_counter() - t
+        output_size = len(b)
+    except Exception as e:
+        return Result(path, output, '{}: {}'.format(type(e).__name__, e),
+                      *times, input_size, output_size, None)
+    return Result(path, output, None, *times, input_size, output_size, None)
+
+
+def _output_paths(paths, output_dir):
+    """
+
+    :param list[str] paths:
+    :param str output_dir:
+    :return: Paths in ``output_dir`` relative to the common directory of ``paths``
+        (files of the same name in different directories don't collide)
+    :rtype: list[str]
+    """
+    if not output_dir:
+        return [None] * len(paths)
+    abs_paths = [os.path.abspath(p) for p in paths]
+    root = os.path.commonpath([os.path.dirname(p) for p in abs_paths]) if paths else ''
+    return [os.path.join(output_dir, os.path.relpath(p, root)) for p in abs_paths]
+
+
+def process(paths, output_dir=None, workers=None, optimize=True, merge_subgraphs=False,
+            profile=False):
+    """
+    Process model files in parallel with :func:`process_file`
+
+    :param paths: File paths and/or glob patterns
+    :param str output_dir:
+        Directory to write processed files. They keep their paths relative to
+        the common directory of the inputs, e.g. ``a/car.3do`` and ``b/car.3do`` are
+        written to ``a/car.3do`` and ``b/car.3do`` in it. It is created if missing.
+    :param int workers: Number of worker processes (default: number of CPUs).
+        Files are processed in this process if 1.
+    :param bool optimize: See :meth:`icr2model.flavor.Flavors.sorted`
+    :param bool merge_subgraphs: See :meth:`icr2model.flavor.Flavors.sorted`
+    :param bool profile: See :func:`process_file`
+    :return: Results in order of the (expanded) paths
+    :rtype: collections.Iterator[Result]
+    """
+    paths = expand_paths(paths)
+    outputs = _output_paths(paths, output_dir)
+    if workers == 1:
+        for p, o in zip(paths, outputs):
+            yield process_file(p, o, optimize, merge_subgraphs, profile)
+        return
+    with ProcessPoolExecutor(workers) as ex:
+        yield from ex.map(process_file, paths, outputs,
+                          [optimize] * len(paths), [merge_subgraphs] * len(paths),
+                          [profile] * len(paths))
@@ -1,61 +1,235 @@
 # coding: utf-8
+from bisect import bisect_right
+from collections import deque
 from warnings import warn
 
 from .flavor import *
 from .flavor.flavor import *
+from .flavor.store import VertexStore
+from .profile import active, stage
+
+_PADDING = bytes(4096)
 
 
 class Body:
     def __init__(self, flavors=None):
         self.flavors = Flavors()  # type: Flavors[int, Flavor]
+        self.vertex_store = None  # type: VertexStore
+
+    def _read_flavor(self, st, buf, offset, parent=None, breadth_first=False, read_vertex=True,
+                     lazy=False):
+        """
+
+        :param st: Body stream (kept by lazy flavors)
+        :param buf: Body buffer values are decoded from (see :meth:`Flavor.read_from`)
+        :param int offset:
+        :param int parent:
+        :param bool breadth_first:
+            A flag to visit flavors level by level instead of depth-first.
+            Resulting flavors are the same but order of ``parents`` may differ.
+        :param bool read_vertex: A flag to read values of vertices (vtypes are resolved anyway)
+        :param bool lazy:
+            A flag to defer reading values of flavors which have no references
+            (see :meth:`icr2model.flavor.flavor.Flavor.read_lazy`)
+        """
+        prof = active()
+        queue = deque([(offset, parent)])  # type: deque[tuple[int, int]]
+        pop = queue.popleft if breadth_first else queue.pop
+        while queue:
+            offset, parent = pop()
+            if offset < 0:
+                continue
+            if offset in self.flavors:
+                f = self.flavors[offset]
+                f.add_parent(parent)
+                if isinstance(f, VertexFlavor):
+                    if prof is None:
+                        self._read_vertex(buf, f, parent, read_vertex and not lazy)
+                    else:
+                        with prof.stage('read_vertex'):
+                            self._read_vertex(buf, f, parent, read_vertex and not lazy)
+                continue
+            f = build_flavor(FLAGS.index(bytes(buf[offset:offset + 4])), offset, parent)
+            if isinstance(f, VertexFlavor) and parent is not None:
+                f.vtype = self.flavors[parent].type
+            if lazy and not isinstance(f, RefFlavor):
+                f.read_lazy(st)
+            elif not isinstance(f, VertexFlavor):
+                f.read_from(buf, offset)
+            elif read_vertex:
+                if prof is None:
+                    f.read_from(buf, offset)
+                else:
+                    with prof.stage('read_vertex'):
+                        f.read_from(buf, offset)
+            self.flavors[offset] = f
+            refs = []
+            if isinstance(f, RefFlavor):
+                refs.extend(f.children)
+            if isinstance(f, F13):
+                refs.append(f.origin)
+            if isinstance(f, F16):
+                refs.append(f.next_offset)
+            if not breadth_first:
+                refs.reverse()  # visit in the same order as recursive traversal
+            queue.extend((o, offset) for o in refs)
 
-    def _read_flavor(self, st, offset, parent=None, *_):
-        if offset < 0:
-            return
-        if offset in self.flavors:
-            self.flavors[offset].parents.append(parent)
-            return
-        st.seek(offset)
-        f = build_flavor(FLAGS.index(st.read(4)), offset, parent)
-        f.read(st)
-        self.flavors[offset] = f
-        if isinstance(f, RefFlavor):
-            for child in f.children:
-                self._read_flavor(st, child, offset)
-        if isinstance(f, F13):
-            self._read_flavor(st, f.origin, offset)
-        if isinstance(f, F16):
-            self._read_flavor(st, f.next_offset, offset)
-
-    def _read_lod(self, st, root_offset):
+    def _read_lod(self, st, buf, root_offset, breadth_first=False, read_vertex=True,
+                  lazy=False):
         root_f = self.flavors[root_offset]  # type: F16
         next_f = self.flavors[root_f.next_offset]  # type: RefFlavor
         lod_root_f = self.flavors[next_f.children[0]]  # type: F11
         mgr_fs = (self.flavors[o] for o in lod_root_f.children)
         for mgr_f in mgr_fs:  # type: F11
             f17_o = mgr_f.offset + mgr_f.length
-            self._read_flavor(st, f17_o, mgr_f.offset)
-
-    def _read_vertex(self, st):
-        for f in self.flavors.by_types(0).values():  # type: Flavor
-            for vtype in set(self.flavors[p].type for p in f.parents):
-                f.vtype = vtype
-            st.seek(f.offset + 4)
-            f.read(st)
-
-    def read(self, stream, root_offset):
-        with self.flavors:
-            self._read_flavor(stream, root_offset)
+            self._read_flavor(st, buf, f17_o, mgr_f.offset, breadth_first, read_vertex, lazy)
+
+    def _read_vertex(self, buf, f, parent, read_vertex=True):
+        """
+        Read values of already read vertex ``f`` which are revealed by another parent
+
+        :param buf:
+        :param VertexFlavor f:
+        :param int parent:
+        :param bool read_vertex: See :meth:`Body._read_flavor`
+        """
+        vtype = f.vtype
+        f.vtype = self.flavors[parent].type
+        if read_vertex and f.vtype != vtype:
+            f.read_from(buf, f.offset)
+
+    def read(self, stream, root_offset, breadth_first=False, vertex_store=False, lazy=False):
+        """
+
+        :param stream: Seekable stream of the body (``getbuffer()`` is used if supported)
+        :param int root_offset:
+        :param bool breadth_first: See :meth:`Body._read_flavor`
+        :param bool vertex_store:
+            A flag to store vertex values in :attr:`vertex_store` and
+            make vertex flavors :class:`icr2model.flavor.store.VertexView` (requires numpy)
+        :param bool lazy: See :meth:`Body._read_flavor`. ``stream`` must be kept open.
+        """
+        if hasattr(stream, 'getbuffer'):
+            buf = stream.getbuffer()
+        else:
+            stream.seek(0)
+            buf = memoryview(stream.read())
+        with buf, self.flavors:
+            with stage('read_flavor'):
+                self._read_flavor(stream, buf, root_offset, None, breadth_first,
+                                  not vertex_store, lazy)
             if self.flavors.has_types(12):  # track
-                self._read_lod(stream, root_offset)
-        self._read_vertex(stream)
-
-    def to_bytes(self):
-        b = b''
-        for o, f in sorted(self.flavors.items()):  # type: int, Flavor
-            assert f.length == len(f.to_bytes()), [f, f.offset, f.length, len(f.to_bytes())]
-            b += bytes(o - len(b)) + f.to_bytes()
-        return b
+                with stage('read_lod'):
+                    self._read_lod(stream, buf, root_offset, breadth_first, not vertex_store,
+                                   lazy)
+            if vertex_store:
+                vtx_fs = self.flavors.by_types(0)
+                with stage('read_vertex'):
+                    self.vertex_store = VertexStore.from_body(buf, vtx_fs)
+                del vtx_fs  # release vertex flavors replaced one by one
+                self.vertex_store.attach(self.flavors)
+
+    @property
+    def length(self):
+        """
+
+        :return: Body length computed from flavor offsets and lengths
+        :rtype: int
+        """
+        return max((o + f.length for o, f in self.flavors.items()), default=0)
+
+    def to_bytes(self, validate=False):
+        """
+
+        :param bool validate:
+            A flag to check length of each serialized flavor and
+            that flavors don't overlap each other
+        :return:
+        :rtype: bytes
+        """
+        with stage('to_bytes'):
+            b = bytearray(self.length)  # zero-filled padding
+            end = 0
+            for o, f in sorted(self.flavors.items()):  # type: int, Flavor
+                fb = f.to_bytes()
+                if validate:
+                    assert f.length == len(fb), [f, o, f.length, len(fb)]
+                    assert end <= o, [f, o, end]
+                    end = o + len(fb)
+                b[o:o + len(fb)] = fb
+            return bytes(b)
+
+    def write(self, stream, validate=False):
+        """
+        Write flavors in offset order to ``stream`` with zero-filled padding between them
+
+        :param stream: Writable binary stream
+        :param bool validate: See :meth:`Body.to_bytes`
+        :return: Number of bytes written
+        :rtype: int
+        """
+        with stage('write'):
+            pos = 0
+            for o in sorted(self.flavors):
+                f = self.flavors[o]  # type: Flavor
+                if o < pos:
+                    raise ValueError('Flavor {} at {} overlaps previous flavor'.format(f, o))
+                fb = f.to_bytes()
+                if validate:
+                    assert f.length == len(fb), [f, o, f.length, len(fb)]
+                while pos < o:
+                    pos += stream.write(_PADDING[:o - pos])
+                pos += stream.write(fb)
+            return pos
+
+    def patch(self, buffer, offsets):
+        """
+        Write flavors at ``offsets`` into ``buffer`` holding the body serialized before
+        they were changed. Nothing is written unless all of them fit in their places,
+        i.e. the same type is at the offset and the flavor doesn't reach the next flavor
+        (the last flavor must end at the end of ``buffer``).
+        Space left by shrunk flavors is zero-filled like :meth:`write`.
+
+        :param buffer: Writable buffer of the body (e.g. ``mmap``)
+        :param offsets: Offsets of changed flavors (see :attr:`icr2model.flavor.Flavors.dirty`)
+        :return: True if written
+        :rtype: bool
+        """
+        chunks = []
+        all_os = sorted(self.flavors) if offsets else []  # values of any type can grow
+        for o in sorted(offsets):
+            f = self.flavors.get(o)  # type: Flavor
+            if f is None or bytes(buffer[o:o + 4]) != FLAGS[f.type]:
+                return False
+            fb = f.to_bytes()
+            i = bisect_right(all_os, o)
+            end = all_os[i] if i < len(all_os) else len(buffer)
+            if end < o + len(fb) or i == len(all_os) and end > o + len(fb):
+                return False  # no padding after the last flavor
+            if end > len(buffer):
+                return False
+            chunks.append((o, fb + bytes(end - o - len(fb))))
+        for o, fb in chunks:
+            buffer[o:o + len(fb)] = fb
+        return True
+
+    def clear_gaps(self, buffer):
+        """
+        Zero-fill space between flavors in ``buffer`` (e.g. values of flavors not referred)
+        like :meth:`write`
+
+        :param buffer: Writable buffer of the body
+        :return: False if length of ``buffer`` differs from :attr:`length`
+        :rtype: bool
+        """
+        if len(buffer) != self.length:
+            return False
+        pos = 0
+        for o in sorted(self.flavors):
+            if pos < o:
+                buffer[pos:o] = bytes(o - pos)
+            pos = o + self.flavors[o].length
+        return True
 
     def get_flavors(self, *types):
         warn('Use .flavors.by_types()', DeprecationWarning)
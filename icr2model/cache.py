@@ -0,0 +1,220 @@
+# coding: utf-8
+import os
+from array import array
+from hashlib import sha1
+from io import BytesIO
+from struct import error as StructError, pack, unpack
+from tempfile import NamedTemporaryFile
+
+from . import __version__
+from .flavor import _FLAVOR
+from .model import Model
+from .stream import BufferStream
+
+__all__ = ['ModelCache']
+
+MAGIC = b'I2MC'
+FORMAT = 1
+EXT = '.i2mc'
+_ARRAYS = (('offsets', 'l'), ('types', 'B'), ('vtypes', 'B'),
+           ('num_parents', 'l'), ('parents', 'l'),
+           ('sizes1', 'l'), ('sizes2', 'l'))  #: name, typecode
+
+
+class ModelCache:
+    """
+    Persistent cache of parsed models keyed by content hash of the file and library version.
+
+    Flavor table (offsets, types, vtypes, parents and byte sizes of values) is stored
+    along with the raw header and body, so a cached model is rebuilt without
+    walking the flavor graph. Least recently used entries are removed
+    when total size of the cache exceeds ``max_size``.
+    """
+
+    def __init__(self, directory, max_size=256 << 20):
+        """
+
+        :param str directory:
+        :param int max_size: Max total size of cache files in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data):
+        """
+
+        :param bytes data: Content of model file
+        :rtype: str
+        """
+        return sha1(data).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, '{}-{}{}'.format(key, __version__, EXT))
+
+    def open(self, path):
+        """
+        Load model from the cache or read and cache it
+
+        :param str path: Model file path
+        :rtype: Model
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        key = self.key(data)
+        m = self.load(key, path)
+        if m is None:
+            m = Model(path)
+            st = BytesIO(data)
+            m.header.read(st)
+            m.body.read(BufferStream(data, st.tell()), m.header.root_offset)
+            self.store(key, m, data[:st.tell()], data[st.tell():])
+        m._sync(path, False)
+        return m
+
+    def load(self, key, path=''):
+        """
+
+        :param str key: See :meth:`ModelCache.key`
+        :param str path: Path set to the model
+        :return: Cached model or None if it is not cached or stale
+        :rtype: Model
+        """
+        cache_path = self._path(key)
+        try:
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+            m = self._decode(data, key, path)
+        except FileNotFoundError:
+            return None
+        except (ValueError, IndexError, EOFError, StructError):  # broken or stale
+            self._remove(cache_path)
+            return None
+        os.utime(cache_path)  # for LRU
+        return m
+
+    def store(self, key, model, header, body):
+        """
+
+        :param str key: See :meth:`ModelCache.key`
+        :param Model model: Model read from ``header`` + ``body``
+        :param bytes header: Raw header
+        :param bytes body: Raw body
+        """
+        data = self._encode(key, model, header, body)
+        with NamedTemporaryFile('wb', dir=self.directory, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Remove cache files of other library versions and least recently used ones
+        exceeding :attr:`max_size`
+        """
+        entries = []
+        suffix = '-{}{}'.format(__version__, EXT)
+        for name in os.listdir(self.directory):
+            p = os.path.join(self.directory, name)
+            if not name.endswith(EXT):
+                continue
+            if not name.endswith(suffix):
+                self._remove(p)
+                continue
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(e[1] for e in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(p)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(EXT):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _encode(key, model, header, body):
+        fs = model.body.flavors
+        table = {name: array(tc) for name, tc in _ARRAYS}
+        for o in sorted(fs):
+            f = fs[o]
+            parents = [p for p in f.parents if p is not None]
+            table['offsets'].append(o)
+            table['types'].append(f.type)
+            table['vtypes'].append(f.vtype if f.type == 0 else 0)  # incl. VertexView
+            table['num_parents'].append(len(parents))
+            table['parents'].extend(parents)
+            table['sizes1'].append(f.values1.length)
+            table['sizes2'].append(f.values2.length)
+        blobs = [key.encode(), __version__.encode(), header, body]
+        blobs.extend(table[name].tobytes() for name, _ in _ARRAYS)
+        return (MAGIC + pack('<H', FORMAT) +
+                b''.join(pack('<Q', len(b)) + b for b in blobs))
+
+    @staticmethod
+    def _decode(data, key, path):
+        if data[:4] != MAGIC or unpack('<H', data[4:6])[0] != FORMAT:
+            raise ValueError('Not a cache file of this format')
+        view = memoryview(data)
+        blobs = []
+        pos = 6
+        while pos < len(data):
+            size = unpack('<Q', data[pos:pos + 8])[0]
+            if pos + 8 + size > len(data):
+                raise ValueError('Truncated cache file')
+            blobs.append(view[pos + 8:pos + 8 + size])
+            pos += 8 + size
+        if len(blobs) != 4 + len(_ARRAYS):
+            raise ValueError('Broken cache file')
+        if bytes(blobs[0]).decode() != key or bytes(blobs[1]).decode() != __version__:
+            raise ValueError('Stale cache file')
+        table = {}
+        for (name, tc), b in zip(_ARRAYS, blobs[4:]):
+            table[name] = array(tc)
+            table[name].frombytes(b)
+        num = len(table['offsets'])
+        if any(len(table[name]) != num for name, _ in _ARRAYS if name != 'parents') or \
+                len(table['parents']) != sum(table['num_parents']):
+            raise ValueError('Broken flavor table')
+        m = Model(path)
+        m.header.read(BytesIO(blobs[2]))
+        body = blobs[3]
+        fs = {}
+        parents = iter(table['parents'])
+        for o, t, vt, n, s1, s2 in zip(table['offsets'], table['types'], table['vtypes'],
+                                       table['num_parents'], table['sizes1'], table['sizes2']):
+            f = _FLAVOR[t](o, next(parents) if n == 1 else None)
+            if n > 1:
+                f.parents = [next(parents) for _ in range(n)]
+            if vt:
+                f.vtype = vt
+            o += 4
+            if o + s1 + s2 > len(body):
+                raise ValueError('Truncated body')
+            for i, (size, values_type) in enumerate(((s1, f.VALUES1), (s2, f.VALUES2))):
+                if size:
+                    v = values_type()
+                    array.frombytes(v, body[o:o + size])
+                    v._owner = f
+                    if i:
+                        f._values2 = v
+                    else:
+                        f._values1 = v
+                    o += size
+            fs[f.offset] = f
+        m.body.flavors.update(fs)
+        return m
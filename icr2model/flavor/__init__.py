@@ -1,9 +1,13 @@
 # coding: utf-8
-from collections import Iterable, defaultdict
+from array import array
+from collections import defaultdict, namedtuple
+from collections.abc import Iterable
+from itertools import accumulate, chain
 
 from .flavor import *
+from ..profile import stage
 
-__all__ = ['build_flavor', 'Flavors']
+__all__ = ['build_flavor', 'Flavors', 'Diff']
 
 _FLAVOR = (F00,  # \x00\x00\x00\x00 F00, V01, V02
            F01,  # \x01\x00\x00\x80
@@ -37,34 +41,149 @@ def build_flavor(type_, offset, parent=None, values1=None, values2=None, **_):
     :return:
     :rtype: Flavor
     """
-    f = _FLAVOR[type_](offset)
-    if isinstance(parent, (int, Iterable)):
-        p = [parent] if isinstance(parent, int) else parent
-        f.parents[:] = p
-    f.values1[:] = map(int, values1 or [])
-    f.values2[:] = map(int, values2 or [])
+    f = _FLAVOR[type_](offset, parent if isinstance(parent, int) else None)
+    if isinstance(parent, Iterable):
+        f.parents = parent
+    if values1:
+        array.extend(f.values1, map(int, values1))  # nothing to notify yet
+    if values2:
+        array.extend(f.values2, map(int, values2))
     if isinstance(f, VertexFlavor):
-        f.vtype = 2 if f.values2 else 1 if f.values1 else 0
+        f.vtype = 2 if values2 else 1 if values1 else 0  # values aren't created if not given
     return f
 
 
+class Diff(namedtuple('Diff', ['added', 'removed', 'changed', 'redirected'])):
+    """
+    Result of :meth:`Flavors.diff`
+
+    - added: Offsets of flavors only in other
+    - removed: Offsets of flavors only in self
+    - changed: Pairs of offsets (self, other) of flavors at the same position with different values
+    - redirected: References (self parent, other parent, self child, other child) of which
+      child is matched to another flavor elsewhere
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return any(self)
+
+
 class Flavors(dict):
+    """
+    Dict of flavors by offset.
+    Offsets by type and comparison keys are kept up to date on item assignment/deletion
+    and on changes of values of the flavors.
+    """
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        super().__init__()
         self._by_type = defaultdict(set)  # type: dict[int, set[int]]  # offsets by type
-        self._cmp_map = {}
+        self._cmp_map = {}  # type: dict[int, int]  # built on demand by ._cmp_key()
+        self._tree_map = {}  # type: dict[int, int]  # built on demand by ._tree_keys()
+        self._graph = None  # built on demand by .graph()
+        self._dirty = set()  # type: set[int]  # offsets changed since .mark_clean()
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def _discard(self, offset, f):
+        """
+
+        :param int offset:
+        :param Flavor f: Flavor removed from this dict
+        """
+        self._by_type[f.type].discard(offset)
+        self._cmp_map.pop(offset, None)
+        self._dirty.add(offset)
+        self._tree_map.clear()
+        self._graph = None
+        if f._container is self:
+            f._container = None
+
+    def _changed(self, flavor):
+        """
+        Called by flavor of which values are changed
 
-    def by_types(self, *types):  # make sure to build ._by_type
+        :param Flavor flavor:
+        """
+        self._cmp_map.pop(flavor.offset, None)
+        self._dirty.add(flavor.offset)
+        self._tree_map.clear()  # keys of ancestors are changed too
+        self._graph = None
+
+    def __setitem__(self, offset, flavor):
+        if offset in self:
+            self._discard(offset, self[offset])
+        super().__setitem__(offset, flavor)
+        self._dirty.add(offset)
+        self._tree_map.clear()
+        self._graph = None
+        self._by_type[flavor.type].add(offset)
+        flavor._container = self
+
+    def __delitem__(self, offset):
+        self._discard(offset, self[offset])
+        super().__delitem__(offset)
+
+    def pop(self, offset, *default):
+        if offset in self:
+            self._discard(offset, self[offset])
+        return super().pop(offset, *default)
+
+    def popitem(self):
+        offset, flavor = super().popitem()
+        self._discard(offset, flavor)
+        return offset, flavor
+
+    def setdefault(self, offset, default=None):
+        if offset not in self:
+            self[offset] = default
+        return self[offset]
+
+    def update(self, *args, **kwargs):
+        for offset, flavor in dict(*args, **kwargs).items():
+            self[offset] = flavor
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self._dirty.update(self)
+        for f in self.values():
+            if f._container is self:
+                f._container = None
+        super().clear()
+        self._by_type.clear()
+        self._cmp_map.clear()
+        self._tree_map.clear()
+        self._graph = None
+
+    @property
+    def dirty(self):
+        """
+
+        :return: Offsets of flavors added, removed or changed since :meth:`mark_clean`
+        :rtype: set[int]
+        """
+        return self._dirty
+
+    def mark_clean(self):
+        """
+        Regard flavors as same as serialized ones (e.g. after reading or writing)
+        """
+        self._dirty.clear()
+
+    def by_types(self, *types):
         """
 
         :param types: Flavor type(s) 0-18
         :return: Dict of flavors filtered by an argument ``types``
         :rtype: dict[int, Flavor]
         """
-        if self.has_types(*types):
-            offsets = [o for t in types for o in self._by_type[t]]
-            return {o: self[o] for o in offsets}
-        return {}
+        return {o: self[o] for t in types for o in self._by_type.get(t, ())}
 
     def has_types(self, *types):
         """
@@ -73,20 +192,283 @@ class Flavors(dict):
         :return:
         :rtype: bool
         """
-        t = ((k for k, v in self._by_type.items() if v) if self._by_type else
-             (f.type for f in self.values()))
-        return bool(set(t) & set(types))
+        return any(self._by_type.get(t) for t in types)
+
+    def _cmp_key(self, offset):
+        """
+        Compact comparison key of a flavor.
+        Flavors with equal keys are most likely equal, confirm with ``==``.
+
+        :param int offset:
+        :return: 64 bit hash of serialized flavor combined with its length
+        :rtype: int
+        """
+        key = self._cmp_map.get(offset)
+        if key is None:
+            b = self[offset].to_bytes()
+            key = self._cmp_map[offset] = len(b) << 64 | hash(b) & 0xffffffffffffffff
+        return key
+
+    def graph(self):
+        """
+
+        :return: Adjacency index of flavors (cached until flavors are changed, requires numpy)
+        :rtype: icr2model.flavor.graph.Graph
+        """
+        if self._graph is None:
+            from .graph import Graph
+            self._graph = Graph(self)
+        return self._graph
+
+    def _lod_offsets(self):
+        """
+
+        :return: F17 offsets by LOD manager (F11) offsets
+        :rtype: dict[int, int]
+        """
+        return {self[o].parents[0]: o for o in self._by_type[17] if self[o].parents}
+
+    def _node(self, offset, lod_os):
+        """
+        Values of a flavor without references, and the references.
+        F17 is regarded as the last reference of its LOD manager.
+        Vertices of F01 and origin of F13 are regarded as values (coordinates) of them
+        since they can be replaced with vertices of the same coordinates.
+
+        :param int offset:
+        :param dict[int, int] lod_os: See :meth:`Flavors._lod_offsets`
+        :return: Local key and offsets of referred flavors
+        :rtype: (object, list[int])
+        """
+        f = self[offset]
+        if not isinstance(f, RefFlavor):
+            return f.to_bytes(), []
+        v1, v2 = f.values1, f.values2
+        if isinstance(f, F01):
+            return (f.type, v1.tobytes(), b''.join(self[o].values1.tobytes() for o in v2)), []
+        rest = b''
+        if isinstance(f, F13):
+            if f.origin in self:
+                v1 = self[f.origin].values1
+            rest, refs = v2[::2].tobytes(), f.children  # distances
+        elif isinstance(f, F16):
+            v1, refs = v1[1:], [v1[0], *v2]
+        else:
+            refs = v2.tolist()
+        local = (f.type, v1.tobytes(), rest, len(refs))
+        if not all(map(self.__contains__, refs)):  # negative offset = no reference
+            local += tuple(o for o in refs if o not in self)
+            refs = [o for o in refs if o in self]
+        if offset in lod_os:
+            refs.append(lod_os[offset])
+        return local, refs
+
+    def _tree_keys(self, root):
+        """
+        Subtree hashes of flavors reachable from ``root``.
+        Flavors with equal keys have (most likely) identical subtrees regardless of their offsets.
+
+        :param int root:
+        :return: Subtree hashes by offset (cached until flavors are changed)
+        :rtype: dict[int, int]
+        """
+        keys = self._tree_map
+        if root in keys:
+            return keys
+        lod_os = self._lod_offsets()
+        nodes = {}  # type: dict[int, tuple]
+        stack = [root]
+        while stack:
+            o = stack[-1]
+            if o not in nodes:
+                nodes[o] = self._node(o, lod_os)
+                for c in nodes[o][1]:
+                    if c in keys or c in nodes:
+                        continue
+                    f = self[c]
+                    if isinstance(f, RefFlavor):
+                        stack.append(c)
+                    else:  # leaf
+                        keys[c] = hash((f.to_bytes(), ()))
+                continue
+            stack.pop()
+            if o not in keys:  # children are done (or in a cycle)
+                local, refs = nodes[o]
+                keys[o] = hash((local, tuple(keys.get(c, 0) for c in refs)))
+        return keys
+
+    def _descendants(self, offsets, lod_os):
+        """
+
+        :param offsets:
+        :param dict[int, int] lod_os:
+        :return: ``offsets`` and offsets of flavors reachable from them
+        :rtype: set[int]
+        """
+        found = set(offsets)
+        stack = list(found)
+        while stack:
+            for c in self._node(stack.pop(), lod_os)[1]:
+                if c not in found:
+                    found.add(c)
+                    stack.append(c)
+        return found
+
+    def diff(self, other, root=None, other_root=None):
+        """
+        Compare flavors by their positions in the graphs instead of offsets.
+        Identical subtrees are found by their (cached) subtree hashes and confirmed
+        by comparing them (each pair of flavors once).
+        A reference to a flavor (with references) identical to another one
+        of the other graph is reported as redirected instead of changes of the subtree.
+
+        >>> model.body.flavors.diff(model.sorted().body.flavors)  # doctest: +SKIP
+        Diff(added=[], removed=[], changed=[], redirected=[])
+
+        :param Flavors other:
+        :param int root: Root offset of self (default: max offset)
+        :param int other_root: Root offset of other (default: max offset)
+        :return: Empty (falsy) diff if both are the same
+        :rtype: Diff
+        """
+        root = max(self) if root is None else root
+        other_root = max(other) if other_root is None else other_root
+        keys, o_keys = self._tree_keys(root), other._tree_keys(other_root)
+        lod_os, o_lod_os = self._lod_offsets(), other._lod_offsets()
+        confirmed = set()  # type: set[tuple[int, int]]
+
+        def same(o, other_o):
+            return self._same_subtree(o, other, other_o, lod_os, o_lod_os, confirmed)
+
+        if keys[root] == o_keys[other_root] and same(root, other_root):
+            return Diff([], [], [], [])
+        key_os, o_key_os = defaultdict(list), defaultdict(list)  # type: dict[int, list[int]]
+        for key_os_, keys_ in ((key_os, keys), (o_key_os, o_keys)):
+            for o in sorted(keys_):
+                key_os_[keys_[o]].append(o)
+        changed, redirected = [], []
+        matches, o_matches = {root: other_root}, {other_root: root}  # type: dict[int, int]
+        sames, o_sames = [], []  # roots of identical subtrees
+
+        def match_same(c, other_c):
+            matches.setdefault(c, other_c)
+            o_matches.setdefault(other_c, c)
+            sames.append(c)
+            o_sames.append(other_c)
+
+        stack = [(root, other_root)]
+        while stack:
+            o, other_o = stack.pop()
+            local, refs = self._node(o, lod_os)
+            o_local, o_refs = other._node(other_o, o_lod_os)
+            if local != o_local:
+                changed.append((o, other_o))
+            for c, other_c in zip(refs, o_refs):
+                if keys[c] == o_keys[other_c] and same(c, other_c):
+                    match_same(c, other_c)
+                    continue
+                if c in matches or other_c in o_matches:
+                    if matches.get(c) != other_c:
+                        redirected.append((o, other_o, c, other_c))
+                    continue
+                if self._is_subtree(c):
+                    same_c = next((s for s in key_os.get(o_keys[other_c], ())
+                                   if same(s, other_c)), None)
+                    same_other_c = next((s for s in o_key_os.get(keys[c], ())
+                                         if same(c, s)), None)
+                    if same_c is not None or same_other_c is not None:
+                        redirected.append((o, other_o, c, other_c))
+                        if same_c is not None:
+                            match_same(same_c, other_c)
+                        if same_other_c is not None:
+                            match_same(c, same_other_c)
+                        continue
+                if self[c].type == other[other_c].type:
+                    matches[c], o_matches[other_c] = other_c, c
+                    stack.append((c, other_c))
+        return Diff(other._unmatched(other_root, o_matches, o_sames, o_lod_os),
+                    self._unmatched(root, matches, sames, lod_os),
+                    sorted(changed), redirected)
+
+    def _same_subtree(self, offset, other, other_offset, lod_os, o_lod_os, confirmed):
+        """
+        Compare subtrees of equal keys (see :meth:`_tree_keys`) to confirm them
+        against hash collision
+
+        :param int offset:
+        :param Flavors other:
+        :param int other_offset:
+        :param dict[int, int] lod_os: See :meth:`Flavors._lod_offsets`
+        :param dict[int, int] o_lod_os: Same as ``lod_os`` of ``other``
+        :param set[tuple[int, int]] confirmed:
+            Pairs of offsets of identical flavors, updated if the subtrees are identical
+        :rtype: bool
+        """
+        pairs = {(offset, other_offset)}
+        stack = [(offset, other_offset)]
+        while stack:
+            o, other_o = stack.pop()
+            if (o, other_o) in confirmed:
+                continue
+            local, refs = self._node(o, lod_os)
+            o_local, o_refs = other._node(other_o, o_lod_os)
+            if local != o_local or len(refs) != len(o_refs):
+                return False
+            for pair in zip(refs, o_refs):
+                if pair not in pairs:  # visited pairs are regarded as identical (cycles)
+                    pairs.add(pair)
+                    stack.append(pair)
+        confirmed.update(pairs)
+        return True
+
+    def _is_subtree(self, offset):
+        """
+
+        :param int offset:
+        :return: False if the flavor is a leaf in :meth:`_node`
+        :rtype: bool
+        """
+        f = self[offset]
+        return isinstance(f, RefFlavor) and not isinstance(f, F01)
+
+    def _unmatched(self, root, matches, sames, lod_os):
+        """
+
+        :param int root:
+        :param dict[int, int] matches: Matched offsets
+        :param list[int] sames: Roots of matched identical subtrees
+        :param dict[int, int] lod_os:
+        :return: Sorted offsets of flavors reachable from ``root`` but not matched
+        :rtype: list[int]
+        """
+        sames = set(sames)
+        found = {root}
+        stack = [root]
+        while stack:
+            o = stack.pop()
+            if o in sames:  # don't walk identical subtrees
+                continue
+            for c in self._node(o, lod_os)[1]:
+                if c not in found:
+                    found.add(c)
+                    stack.append(c)
+        found.difference_update(matches)
+        if found:  # exclude flavors shared with identical subtrees
+            found -= self._descendants(sames, lod_os)
+        return sorted(found)
 
     def _get_eq_flavor(self, offset, offsets):
-        eq_os = (o for o in offsets if self._cmp_map[o] == self._cmp_map[offset])
-        return next(eq_os, None)
+        f = self[offset]
+        return next((o for o in offsets if self[o] == f), None)
 
     def _gen_redirections(self, offsets):
-        os_ = sorted(offsets)
-        while os_:
-            o = os_.pop()
-            eq_o = self._get_eq_flavor(o, os_)
-            if eq_o is not None:
+        eq_os = {}  # type: dict[int, list[int]]  # cmp key: lowest offsets of distinct flavors
+        for o in sorted(offsets):
+            os_ = eq_os.setdefault(self._cmp_key(o), [])
+            eq_o = self._get_eq_flavor(o, os_)  # confirm against hash collision
+            if eq_o is None:
+                os_.append(o)
+            else:
                 yield o, eq_o
 
     def _gen_vtx_redirections(self):
@@ -95,11 +477,11 @@ class Flavors(dict):
         v02_os = [o for o in vtx_os if self[o].vtype == 2]
         v02_co_map = {self[o].co: o for o in v02_os}
         vtx_map = dict(self._gen_redirections(v02_os))  # type: dict[int, int]
-        while v01_os:  # v01
-            v01_o = v01_os.pop()
+        v01_map = dict(self._gen_redirections(v01_os))  # type: dict[int, int]
+        for v01_o in v01_os:  # v01
             v01_co = self[v01_o].co
             v02_o = (v02_co_map[v01_co] if v01_co in v02_co_map else
-                     self._get_eq_flavor(v01_o, v01_os))  # avoid to skip v02 with offset 0
+                     v01_map.get(v01_o))  # avoid to skip v02 with offset 0
             if v02_o is not None:
                 yield v01_o, vtx_map.get(v02_o, v02_o)
         yield from vtx_map.items()  # v02
@@ -119,6 +501,50 @@ class Flavors(dict):
             else:
                 yield from self._gen_redirections(self._by_type[t])
 
+    def _gen_subgraph_redirections(self):
+        """
+        Redirections of flavors (except vertices) to the lowest flavors with identical subgraphs.
+        Subgraphs are identified bottom-up in one sweep by their values without references
+        and identities of their children, so identical subgraphs are merged regardless of
+        offsets of their vertices and order of flavors.
+        F12, F17 and LOD managers (and flavors referring them) are never merged.
+        """
+        lod_os = self._lod_offsets()
+        excls = self._by_type[12] | self._by_type[17] | set(lod_os)
+        ids = {}  # type: dict[object, int]  # structure: subgraph id
+        sg_ids = {}  # type: dict[int, int]  # offset: subgraph id
+        for root in sorted(self):
+            if root in sg_ids:
+                continue
+            nodes = {}  # type: dict[int, tuple]
+            stack = [root]
+            while stack:
+                o = stack[-1]
+                if o not in nodes:
+                    nodes[o] = self._node(o, lod_os)
+                    stack.extend(c for c in nodes[o][1] if c not in sg_ids and c not in nodes)
+                    continue
+                stack.pop()
+                if o not in sg_ids:  # children are done (or in a cycle)
+                    local, refs = nodes[o]
+                    key = o if o in excls else (local, tuple(sg_ids.get(c) for c in refs))
+                    sg_ids[o] = ids.setdefault(key, len(ids))
+        lowest_os = {}  # type: dict[int, int]  # subgraph id: lowest offset
+        for o in sorted(sg_ids):
+            lowest_o = lowest_os.setdefault(sg_ids[o], o)
+            if lowest_o != o and self[o].type != 0:
+                yield o, lowest_o
+
+    def subgraph_saving(self):
+        """
+
+        :return: Bytes saved by ``sorted(merge_subgraphs=True)`` compared to ``sorted(True)``
+        :rtype: int
+        """
+        flavor_map = dict(self._generate_redirections())
+        return sum(self[o].length for o, _ in self._gen_subgraph_redirections()
+                   if o not in flavor_map)
+
     def _generate_sorted_offsets(self):  # chg only orders
         vtx_os = self._by_type[0]
         yield from sorted(vtx_os, key=lambda o: (-self[o].vtype, o))
@@ -144,24 +570,48 @@ class Flavors(dict):
         else:  # obj/car
             yield from sorted(set(self) - vtx_os)
 
-    def sorted(self, optimize=True):
+    def layout(self, order, start=0):
+        """
+        Offsets of flavors packed in ``order`` (lengths of flavors are cached by themselves)
+
+        :param list[int] order: Offsets of flavors
+        :param int start: Offset of the first flavor
+        :return: New offsets in the same order as ``order`` and the end offset
+        :rtype: (list[int], int)
+        """
+        offsets = list(accumulate(chain([start], (self[o].length for o in order))))
+        return offsets[:-1], offsets[-1]
+
+    def sorted(self, optimize=True, merge_subgraphs=False):
         """
 
         :param bool optimize:
             A flag to merge redundant flavors (they have same values) to single flavor and
             make their parents refer merged flavor
+        :param bool merge_subgraphs:
+            A flag to merge identical subgraphs too, even if their flavors refer different
+            (but identical) children (``optimize`` only)
         :return: New flavors object
         :rtype: Flavors
         """
-        opt_map = dict(self._generate_redirections()) if optimize else {}  # type: dict[int, int]
-        new_os = {}  # type: dict[int, int]  # org offset: new offset
+        opt_map = {}  # type: dict[int, int]
+        with stage('generate_redirections'):
+            if optimize and merge_subgraphs:  # includes all redirections except vertices
+                opt_map.update(self._generate_redirections(0))
+                opt_map.update(self._gen_subgraph_redirections())
+            elif optimize:
+                opt_map.update(self._generate_redirections())
+        with stage('generate_sorted_offsets'):
+            sorted_os = list(self._generate_sorted_offsets())
+        org_os = [o for o in sorted_os if o not in opt_map]
+        new_os = dict(zip(org_os, self.layout(org_os)[0]))  # type: dict[int, int]  # org: new
         new_fs = {}  # type: dict[int, Flavor]
-        offset = 0
-        for org_o in self._generate_sorted_offsets():  # type: int
+        lod_mgr_o = None
+        for org_o in sorted_os:  # type: int
             if org_o in opt_map:
                 new_os[org_o] = new_os[opt_map[org_o]]
                 continue
-            new_os[org_o] = offset
+            offset = new_os[org_o]
             org_f = self[org_o]
             if isinstance(org_f, F04) and org_o == 0:
                 # and org_f.children == [-1]
@@ -169,44 +619,38 @@ class Flavors(dict):
             elif isinstance(org_f, RefFlavor):
                 v2 = [new_os[o] for o in org_f.children]
                 for o in v2:
-                    new_fs[o].parents.append(offset)
+                    new_fs[o].add_parent(offset)
                 if isinstance(org_f, F13):
                     v1 = [new_os[org_f.origin]]
                     v2 = [v for vs in zip(org_f.distances, v2) for v in vs]
-                    new_fs[v1[0]].parents.append(offset)
+                    new_fs[v1[0]].add_parent(offset)
                 elif isinstance(org_f, F16):
                     v1 = (new_os[org_f.values1[0]], org_f.values1[1])
-                    new_fs[v1[0]].parents.append(offset)
+                    new_fs[v1[0]].add_parent(offset)
                 else:
                     v1 = org_f.values1
             else:
                 v1, v2 = org_f.values1, org_f.values2
             new_f = build_flavor(org_f.type, offset, values1=v1, values2=v2)
             if isinstance(org_f, F17):
-                lod_mgr_o = new_fs[max(new_fs)].offset  # F11 offset
-                new_f.parents.append(lod_mgr_o)
+                new_f.add_parent(lod_mgr_o)  # F11 placed just before
             new_fs[offset] = new_f
-            offset += new_f.length
-        with Flavors(new_fs) as fs:  # for to build ._by_type
-            return fs
+            lod_mgr_o = offset
+        return Flavors(new_fs)
 
-    def sort(self, optimize=True):
+    def sort(self, optimize=True, merge_subgraphs=False):
         """
 
         :param bool optimize: See description of param ``optimize`` of :meth:`icr2model.flavor.Flavors.sorted`
+        :param bool merge_subgraphs: See :meth:`icr2model.flavor.Flavors.sorted`
         :return:
         """
-        new_fs = self.sorted(optimize)
+        new_fs = self.sorted(optimize, merge_subgraphs)
         self.clear()
-        self._by_type.clear()
-        self._cmp_map.clear()
-        with self:
-            self.update(new_fs)
+        self.update(new_fs)
 
-    def __enter__(self):
+    def __enter__(self):  # indexes are always up to date, kept for compatibility
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        for o, f in self.items():  # type: int, Flavor
-            self._by_type[f.type].add(o)
-            self._cmp_map[o] = (f.type, tuple(f.values1), tuple(f.values2))
+        pass
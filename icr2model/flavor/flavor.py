@@ -1,5 +1,5 @@
 # coding: utf-8
-from struct import unpack
+from struct import unpack, unpack_from
 from warnings import warn
 
 from .value.values import *
@@ -52,23 +52,154 @@ READ_SIZES = ((12, None),  # lllhh(3l2h)
 
 
 class Flavor:
+    __slots__ = ('offset', '_parents', '_values1', '_values2', '_source', '_container', '_length')
     TYPE = None
+    VALUES1 = Values
+    VALUES2 = Values
 
     def __init__(self, offset, parent=None):
         self.offset = offset
-        self.parents = [] if parent is None else [parent]
-        self.values1 = Values()
-        self.values2 = Values()
+        self._parents = parent  # type: None | int | list[int]  # single parent is stored inline
+        self._source = None  # stream to read values from on first access
+        self._container = None  # Flavors notified of value changes
+        self._values1 = None  # created on first access
+        self._values2 = None
+        self._length = None  # cached by .length until values are changed
+
+    def __getstate__(self):
+        if self._source is not None:
+            self._decode()
+        return {k: getattr(self, k)
+                for c in type(self).__mro__ for k in getattr(c, '__slots__', ())
+                if k not in ('_source', '_container', '_length') and hasattr(self, k)}
+
+    def __setstate__(self, state):
+        self._source = self._container = self._length = None
+        for k, v in state.items():
+            setattr(self, k, v)
+            if isinstance(v, Values):
+                v._owner = self
+
+    def _decode(self):
+        st, self._source = self._source, None
+        st.seek(self.offset + 4)
+        self.read(st)
+
+    def _changed(self):
+        self._length = None
+        if self._container is not None:
+            self._container._changed(self)
+
+    def _own(self, values, values_type):
+        if not isinstance(values, Values):
+            values = values_type(values)
+        values._owner = self
+        return values
+
+    @property
+    def values1(self):
+        """
+
+        :rtype: Values
+        """
+        if self._source is not None:
+            self._decode()
+        if self._values1 is None:
+            self._values1 = self._own(self.VALUES1(), self.VALUES1)
+        return self._values1
+
+    @values1.setter
+    def values1(self, values):
+        if self._source is not None:
+            self._decode()
+        self._values1 = self._own(values, self.VALUES1)
+        self._changed()
+
+    @property
+    def values2(self):
+        """
+
+        :rtype: Values
+        """
+        if self._source is not None:
+            self._decode()
+        if self._values2 is None:
+            self._values2 = self._own(self.VALUES2(), self.VALUES2)
+        return self._values2
+
+    @values2.setter
+    def values2(self, values):
+        if self._source is not None:
+            self._decode()
+        self._values2 = self._own(values, self.VALUES2)
+        self._changed()
+
+    @property
+    def parents(self):
+        """
+
+        :rtype: list[int]
+        """
+        if not isinstance(self._parents, list):
+            self._parents = [] if self._parents is None else [self._parents]
+        return self._parents
+
+    @parents.setter
+    def parents(self, parents):
+        self._parents = list(parents)
+
+    def add_parent(self, parent):
+        """
+        Same as ``.parents.append(parent)`` but keeps single parent inline
+
+        :param int parent:
+        """
+        if self._parents is None:
+            self._parents = parent
+        elif isinstance(self._parents, list):
+            self._parents.append(parent)
+        else:
+            self._parents = [self._parents, parent]
 
     def _read_v1(self, st):
         self.values1.read(st, READ_SIZES[self.type][0])
 
     def _read_v2(self, st):
-        self.values2.read(st, READ_SIZES[self.type][1])
+        self.values2.read(st, self._v2_size())
+
+    def _v2_size(self):
+        return READ_SIZES[self.type][1]
 
     def read(self, stream):
         self._read_v1(stream)
         self._read_v2(stream)
+        self._length = None
+
+    def _read_v2_from(self, buffer, pos):
+        self.values2.read_from(buffer, pos, self._v2_size())
+
+    def read_from(self, buffer, offset):
+        """
+        Same as :meth:`read` but values are decoded from ``buffer`` at the position
+        of the flavor without a stream
+
+        :param buffer: Body buffer (e.g. ``memoryview`` of ``mmap``)
+        :param int offset: Position of the flag
+        """
+        pos = offset + 4
+        size = READ_SIZES[self.type][0]
+        self.values1.read_from(buffer, pos, size)
+        self._read_v2_from(buffer, pos + size)
+        self._length = None
+
+    def read_lazy(self, stream):
+        """
+        Defer reading values until :attr:`values1` or :attr:`values2` is accessed.
+        ``stream`` must be kept open (seekable) until then.
+
+        :param stream:
+        """
+        self._source = stream
 
     def to_bytes(self):
         return (FLAGS[self.type] +
@@ -77,7 +208,7 @@ class Flavor:
 
     def to_str(self):
         return ' '.join(
-            map(str, ['F{:02}'.format(self.type)] + self.values1 + self.values2))
+            map(str, ['F{:02}'.format(self.type), *self.values1, *self.values2]))
 
     @property
     def type(self):
@@ -85,6 +216,16 @@ class Flavor:
 
     @property
     def length(self):
+        """
+
+        :return: Serialized length (cached until values are changed)
+        :rtype: int
+        """
+        if self._length is None:
+            self._length = self._get_length()
+        return self._length
+
+    def _get_length(self):
         v2len = READ_SIZES[self.type][1] or self.values2.length
         return READ_SIZES[self.type][0] + v2len + 4  # 4 for flag
 
@@ -95,37 +236,63 @@ class Flavor:
 
 
 class FixedFlavor(Flavor):
-    pass
+    __slots__ = ()
 
 
 class RefFlavor(Flavor):
+    __slots__ = ()
+
     @property
     def children(self):
         return self.values2
 
 
 class VarFlavor(RefFlavor):
-    def _read_v2(self, st):
-        self.values2.read(st, self.values1[-1] * 4)
+    __slots__ = ()
+
+    def _v2_size(self):
+        return self.values1[-1] * 4
 
 
 class VertexFlavor(FixedFlavor):
+    __slots__ = ('_vtype',)
     TYPE = 0
     VTYPE = 0
+    VALUES1 = CoordinateValues
+    VALUES2 = UVValues
 
     def __init__(self, offset, parent=None):
         super().__init__(offset, parent)
-        self.values1 = CoordinateValues()
-        self.values2 = UVValues()
         self._vtype = 0
 
-    def _read_v2(self, st):
-        if self.vtype == 2:
-            self.values2.read(st, 4)
+    def _v2_size(self):
+        return 4 if self.vtype == 2 else 0
 
     def read(self, stream):
-        if self.vtype:
-            super().read(stream)
+        """
+        Read values not read yet according to :attr:`vtype`.
+        ``stream`` must be positioned at the first unread value.
+
+        :param stream:
+        """
+        if self.vtype and not self.values1:
+            self._read_v1(stream)
+        if not self.values2:
+            self._read_v2(stream)
+        self._length = None
+
+    def read_from(self, buffer, offset):
+        """
+        Same as :meth:`read` but values are decoded from ``buffer`` at their positions
+
+        :param buffer: See :meth:`Flavor.read_from`
+        :param int offset: Position of the flag
+        """
+        if self.vtype and not self.values1:
+            self.values1.read_from(buffer, offset + 4, 12)
+        if self.vtype == 2 and not self.values2:
+            self.values2.read_from(buffer, offset + 16, 4)
+        self._length = None
 
     @property
     def co(self):
@@ -145,13 +312,13 @@ class VertexFlavor(FixedFlavor):
             vtype = 1
         if vtype in (1, 2) and vtype > self._vtype:
             self._vtype = vtype
+            self._length = None
 
     def to_str(self):
         t = 'V{:02}'.format(self.vtype) if self.vtype else 'F00'
-        return ' '.join(map(str, [t] + self.values1 + self.values2))
+        return ' '.join(map(str, [t, *self.values1, *self.values2]))
 
-    @property
-    def length(self):
+    def _get_length(self):
         return self.values1.length + self.values2.length + 4  # 4 for flag
 
     def set_vtype(self, vtype):
@@ -160,20 +327,24 @@ class VertexFlavor(FixedFlavor):
 
 
 class F00(VertexFlavor):
-    pass
+    __slots__ = ()
 
 
 class V01(VertexFlavor):
+    __slots__ = ()
     VTYPE = 1
 
 
 class V02(VertexFlavor):
+    __slots__ = ()
     VTYPE = 2
 
 
 class FaceFlavor(RefFlavor):
-    def _read_v2(self, st):
-        self.values2.read(st, (self.values1[-1] + 1) * 4)
+    __slots__ = ()
+
+    def _v2_size(self):
+        return (self.values1[-1] + 1) * 4
 
     @property
     def color(self):
@@ -186,18 +357,22 @@ class FaceFlavor(RefFlavor):
 
 
 class F01(FaceFlavor):
+    __slots__ = ()
     TYPE = 1
 
 
 class F02(FaceFlavor):
+    __slots__ = ()
     TYPE = 2
 
 
 class F03(FixedFlavor):
+    __slots__ = ()
     TYPE = 3
 
 
 class F04(RefFlavor):
+    __slots__ = ()
     TYPE = 4
 
     @property
@@ -215,36 +390,42 @@ class F04(RefFlavor):
 
 
 class BspFlavor(RefFlavor):
-    def __init__(self, offset, parent=None):
-        super().__init__(offset, parent)
-        self.values1 = BspValues()
+    __slots__ = ()
+    VALUES1 = BspValues
 
 
 class F05(BspFlavor):
+    __slots__ = ()
     TYPE = 5
 
 
 class F06(BspFlavor):
+    __slots__ = ()
     TYPE = 6
 
 
 class F07(BspFlavor):
+    __slots__ = ()
     TYPE = 7
 
 
 class F08(BspFlavor):
+    __slots__ = ()
     TYPE = 8
 
 
 class F09(BspFlavor):
+    __slots__ = ()
     TYPE = 9
 
 
 class F10(BspFlavor):
+    __slots__ = ()
     TYPE = 10
 
 
 class F11(VarFlavor):
+    __slots__ = ()
     TYPE = 11
 
     @property
@@ -253,10 +434,12 @@ class F11(VarFlavor):
 
 
 class F12(FixedFlavor):
+    __slots__ = ()
     TYPE = 12
 
 
 class F13(RefFlavor):
+    __slots__ = ()
     TYPE = 13
 
     def _read_v2(self, st):
@@ -266,13 +449,21 @@ class F13(RefFlavor):
             if d == 0:
                 break
 
+    def _read_v2_from(self, buffer, pos):
+        while True:
+            d, o = unpack_from('2l', buffer, pos)
+            self.values2.extend((d, o))
+            if d == 0:
+                break
+            pos += 8
+
     @property
     def origin(self):
         return self.values1[0]
 
     @property
     def distances(self):
-        return self.values2[::2]
+        return self.values2[::2].tolist()
 
     @property
     def children(self):
@@ -280,25 +471,33 @@ class F13(RefFlavor):
 
         :rtype: list[int]
         """
-        return self.values2[1::2]
+        return self.values2[1::2].tolist()
 
 
 class F14(Flavor):
+    __slots__ = ()
     TYPE = 14
 
+    def _v2_size(self):
+        return self.values1[0] * 8
+
     def _read_v2(self, st):
-        self.values2.read(st, self.values1[0] * 8)
+        super()._read_v2(st)
+        assert self.values1[0] * 2 == len(self.values2)
+
+    def _read_v2_from(self, buffer, pos):
+        super()._read_v2_from(buffer, pos)
         assert self.values1[0] * 2 == len(self.values2)
 
     def to_bytes(self):
         return super().to_bytes() + b'\xff\xff\xff\xff'
 
-    @property
-    def length(self):
-        return super().length + 4
+    def _get_length(self):
+        return super()._get_length() + 4
 
 
 class F15(FixedFlavor):
+    __slots__ = ()
     TYPE = 15
 
     @property
@@ -316,7 +515,7 @@ class F15(FixedFlavor):
         :return: location x, y, z
         :rtype: list[int]
         """
-        return self.values1[:3]
+        return self.values1[:3].tolist()
 
     @property
     def rotation(self):
@@ -325,7 +524,7 @@ class F15(FixedFlavor):
         :return: rotation z, y, x
         :rtype: list[int]
         """
-        return self.values1[3:6]
+        return self.values1[3:6].tolist()
 
     @property
     def object_index(self):
@@ -334,6 +533,7 @@ class F15(FixedFlavor):
 
 
 class F16(VarFlavor):
+    __slots__ = ()
     TYPE = 16
 
     @property
@@ -342,10 +542,12 @@ class F16(VarFlavor):
 
 
 class F17(FixedFlavor):
+    __slots__ = ()
     TYPE = 17
 
 
 class F18(FixedFlavor):
+    __slots__ = ()
     TYPE = 18
 
     @property
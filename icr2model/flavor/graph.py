@@ -0,0 +1,178 @@
+# coding: utf-8
+from .flavor import F01, F02, F13, F16, RefFlavor
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+__all__ = ['Graph']
+
+
+class Graph:
+    """
+    Adjacency index of flavors in CSR form.
+    Nodes are flavors in offset order, references are children, origin of F13,
+    next of F16 and F17 of LOD manager (F11).
+    Build with :meth:`icr2model.flavor.Flavors.graph` to reuse it until flavors are changed.
+    """
+
+    def __init__(self, flavors):
+        """
+
+        :param icr2model.flavor.Flavors flavors:
+        """
+        if np is None:
+            raise ImportError('Graph requires numpy')
+        self.flavors = flavors
+        offsets = sorted(flavors)
+        lod_os = flavors._lod_offsets()
+        counts = []
+        refs = []
+        for o in offsets:
+            f = flavors[o]
+            n = len(refs)
+            if isinstance(f, RefFlavor):
+                if isinstance(f, F13):
+                    refs.append(f.origin)
+                    refs.extend(f.children)
+                else:
+                    if isinstance(f, F16):
+                        refs.append(f.next_offset)
+                    refs.extend(f.values2)
+                if o in lod_os:
+                    refs.append(lod_os[o])
+            counts.append(len(refs) - n)
+        self.offsets = np.array(offsets, np.int64)  # node -> offset
+        self.types = np.array([flavors[o].type for o in offsets], np.int8)
+        ref_os = np.array(refs, np.int64)
+        idx = np.searchsorted(self.offsets, ref_os).clip(0, max(len(offsets) - 1, 0))
+        valid = self.offsets[idx] == ref_os if len(offsets) else np.zeros(0, bool)
+        nodes = np.repeat(np.arange(len(offsets)), counts)[valid]
+        self.child_ptr, self.child_idx = self._csr(nodes, idx[valid])
+        self.parent_ptr, self.parent_idx = self._csr(idx[valid], nodes)
+        is_f04 = self.types == 4
+        self._f04_nodes = np.flatnonzero(is_f04)
+        self._f04_indexes = np.array([flavors[o].index for o in self.offsets[is_f04].tolist()],
+                                     np.int64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _csr(self, sources, targets):
+        order = np.argsort(sources, kind='stable')
+        ptr = np.zeros(len(self) + 1, np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self)), out=ptr[1:])
+        return ptr, targets[order]
+
+    def nodes(self, offsets):
+        """
+
+        :param offsets: Flavor offsets
+        :return: Node indexes
+        :rtype: numpy.ndarray
+        """
+        offsets = np.atleast_1d(np.asarray(offsets, np.int64))
+        idx = np.searchsorted(self.offsets, offsets)
+        if (idx >= len(self)).any() or (self.offsets[idx] != offsets).any():
+            raise KeyError(offsets[(idx >= len(self)) |
+                                   (self.offsets[idx.clip(0, len(self) - 1)] != offsets)])
+        return idx
+
+    def children(self, offset):
+        """
+
+        :param int offset:
+        :return: Offsets of referred flavors
+        :rtype: list[int]
+        """
+        i = self.nodes(offset)[0]
+        return self.offsets[self.child_idx[self.child_ptr[i]:self.child_ptr[i + 1]]].tolist()
+
+    def parents(self, offset):
+        """
+
+        :param int offset:
+        :return: Offsets of referring flavors
+        :rtype: list[int]
+        """
+        i = self.nodes(offset)[0]
+        return self.offsets[self.parent_idx[self.parent_ptr[i]:self.parent_ptr[i + 1]]].tolist()
+
+    def _walk(self, ptr, idx, nodes, types):
+        """
+        Level by level traversal
+
+        :return: Sorted offsets of visited flavors (including ``nodes``) filtered by ``types``
+        :rtype: list[int]
+        """
+        seen = np.zeros(len(self), bool)
+        frontier = np.unique(nodes)
+        seen[frontier] = True
+        found = [frontier]
+        while len(frontier):
+            starts = ptr[frontier]
+            counts = ptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                break
+            pos = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            frontier = np.unique(idx[pos])
+            frontier = frontier[~seen[frontier]]
+            seen[frontier] = True
+            found.append(frontier)
+        found = np.sort(np.concatenate(found))
+        if types:
+            found = found[np.isin(self.types[found], types)]
+        return self.offsets[found].tolist()
+
+    def descendants(self, *offsets, types=()):
+        """
+
+        :param offsets: Flavor offsets
+        :param types: Flavor types to filter
+        :return: Sorted offsets of ``offsets`` and flavors reachable from them
+        :rtype: list[int]
+        """
+        return self._walk(self.child_ptr, self.child_idx, self.nodes(offsets), types)
+
+    def ancestors(self, *offsets, types=()):
+        """
+
+        :param offsets: Flavor offsets
+        :param types: Flavor types to filter
+        :return: Sorted offsets of ``offsets`` and flavors which can reach them
+        :rtype: list[int]
+        """
+        return self._walk(self.parent_ptr, self.parent_idx, self.nodes(offsets), types)
+
+    def faces(self, offset):
+        """
+
+        :param int offset:
+        :return: Offsets of F01/F02 under the flavor at ``offset`` (e.g. LOD manager)
+        :rtype: list[int]
+        """
+        return self.descendants(offset, types=(F01.TYPE, F02.TYPE))
+
+    def textures(self, index):
+        """
+
+        :param int index: mip index
+        :return: Offsets of F04 using the mip
+        :rtype: list[int]
+        """
+        return self.offsets[self._f04_nodes[self._f04_indexes == index]].tolist()
+
+    def subgraph(self, offset):
+        """
+        Copy of flavors reachable from ``offset`` (except F17) keeping their offsets
+
+        :param int offset:
+        :rtype: icr2model.flavor.Flavors
+        """
+        from . import Flavors, build_flavor
+        fs = self.flavors
+        return Flavors((o, build_flavor(fs[o].type, o, values1=fs[o].values1,
+                                        values2=fs[o].values2))
+                       for o in self.descendants(offset) if fs[o].type != 17)
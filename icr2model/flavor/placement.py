@@ -0,0 +1,140 @@
+# coding: utf-8
+from array import array
+
+from .value.unit import INT32_MAX, INT32_MIN
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+__all__ = ['to_int32_array', 'to_degree_array', 'to_papy_angle_array', 'Placements']
+
+
+def to_int32_array(values):
+    """
+    Vectorized :func:`icr2model.flavor.value.unit.to_int32`
+
+    :param values: array-like of int or float
+    :return: int64 array of values wrapped into int32 range
+    :rtype: numpy.ndarray
+    """
+    v = np.array(values)
+    v = v.astype(np.float64 if v.dtype.kind == 'f' else np.int64)
+    low = v <= INT32_MIN
+    v[low] += ((INT32_MIN - v[low]) // (1 << 32) + 1) * (1 << 32)
+    high = v >= INT32_MAX
+    v[high] -= ((v[high] - INT32_MAX) // (1 << 32) + 1) * (1 << 32)
+    return np.trunc(v).astype(np.int64) if v.dtype.kind == 'f' else v
+
+
+def to_degree_array(papy_angles):
+    """
+    Vectorized :func:`icr2model.flavor.value.unit.to_degree`
+
+    :param papy_angles: array-like
+    :rtype: numpy.ndarray
+    """
+    return np.asarray(papy_angles) / (INT32_MAX / 180.0)
+
+
+def to_papy_angle_array(degrees, ndigits=1):
+    """
+    Vectorized :func:`icr2model.flavor.value.unit.to_papy_angle`.
+    Rounding follows :func:`numpy.round`, which may differ from :func:`round` on ties.
+
+    :param degrees: array-like
+    :param int ndigits: round
+    :rtype: numpy.ndarray
+    """
+    return to_int32_array(np.round(np.asarray(degrees, np.float64), ndigits) *
+                          (INT32_MAX / 180.0))
+
+
+class Placements:
+    """
+    Locations and rotations of F15 flavors as (N, 6) int64 array
+    (location x, y, z and rotation z, y, x per row)
+
+    >>> p = Placements(model.body.flavors.by_types(15))  # doctest: +SKIP
+    >>> p.translate(0, 0, 1000)  # doctest: +SKIP
+    >>> p.rotate(90)  # doctest: +SKIP
+    >>> p.write(model.body.flavors)  # doctest: +SKIP
+    """
+
+    def __init__(self, flavors):
+        """
+
+        :param dict[int, icr2model.flavor.flavor.F15] flavors: F15 flavors
+        """
+        if np is None:
+            raise ImportError('Placements requires numpy')
+        self.offsets = sorted(flavors)
+        self.values = np.array([flavors[o].values1[:6] for o in self.offsets],
+                               np.int64).reshape(-1, 6)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def locations(self):
+        """
+
+        :return: (N, 3) view of x, y, z
+        :rtype: numpy.ndarray
+        """
+        return self.values[:, :3]
+
+    @property
+    def rotations(self):
+        """
+
+        :return: (N, 3) view of z, y, x in papy angle
+        :rtype: numpy.ndarray
+        """
+        return self.values[:, 3:6]
+
+    @property
+    def degrees(self):
+        """
+
+        :return: (N, 3) rotations in degree
+        :rtype: numpy.ndarray
+        """
+        return to_degree_array(self.rotations)
+
+    @degrees.setter
+    def degrees(self, degrees):
+        self.values[:, 3:6] = to_papy_angle_array(degrees)
+
+    def translate(self, x=0, y=0, z=0):
+        """
+
+        :param x: int or (N,) array-like
+        :param y:
+        :param z:
+        """
+        self.values[:, :3] = to_int32_array(self.locations + np.stack(
+            np.broadcast_arrays(x, y, z, np.empty(len(self))), axis=-1)[:, :3])
+
+    def rotate(self, z=0.0, y=0.0, x=0.0, ndigits=1):
+        """
+        Add rotation in degree (wrapped around like papy angle)
+
+        :param z: float or (N,) array-like
+        :param y:
+        :param x:
+        :param int ndigits: See :func:`to_papy_angle_array`
+        """
+        deltas = np.stack(np.broadcast_arrays(z, y, x, np.empty(len(self))), axis=-1)[:, :3]
+        self.values[:, 3:6] = to_int32_array(self.rotations + to_papy_angle_array(deltas, ndigits))
+
+    def write(self, flavors):
+        """
+        Write locations and rotations back to F15 flavors
+
+        :param dict[int, icr2model.flavor.flavor.F15] flavors:
+        """
+        for o, row in zip(self.offsets, self.values.tolist()):
+            values = flavors[o].values1
+            values[:6] = array(values.typecode, row)
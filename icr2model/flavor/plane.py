@@ -0,0 +1,71 @@
+# coding: utf-8
+from array import array
+
+from .value.unit import INT32_MAX, INT32_MIN
+from .value.values import BspValues
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+__all__ = ['bsp_planes', 'write_bsp_planes']
+
+
+def _round(normals):
+    """
+    Vectorized :meth:`icr2model.flavor.value.vector.Vector.round`.
+    Halves whole rows (floor) until all of their values are in int32.
+
+    :param numpy.ndarray normals: (N, 3) int64, modified in place
+    :rtype: numpy.ndarray
+    """
+    out = ((normals <= INT32_MIN) | (INT32_MAX <= normals)).any(axis=1)
+    while out.any():
+        normals[out] >>= 1
+        out[out] = ((normals[out] <= INT32_MIN) | (INT32_MAX <= normals[out])).any(axis=1)
+    return normals
+
+
+def bsp_planes(co1, co2, co3):
+    """
+    Vectorized :meth:`icr2model.flavor.value.values.BspValues.from_coordinates`
+
+    :param co1: (N, 3) array-like of first vertex coordinates of triangles
+    :param co2: (N, 3) array-like
+    :param co3: (N, 3) array-like
+    :return: normals (N, 3) and magnitudes (N,) as int64 arrays
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    if np is None:
+        raise ImportError('bsp_planes requires numpy')
+    va, vb, vc = (np.asarray(co).astype(np.int64).reshape(-1, 3) for co in (co1, co2, co3))
+    ab = vb - va
+    ac = vc - va
+    normals = np.cross(ab, ac)
+    # rows which may overflow int64 are computed with python int
+    big = ((np.abs(ab) >= 1 << 31) | (np.abs(ac) >= 1 << 31) |
+           (np.abs(va) >= 1 << 30)).any(axis=1)
+    _round(normals)
+    magnitudes = -(va * normals).sum(axis=1)
+    for i in np.flatnonzero(big).tolist():
+        bspv = BspValues.from_coordinates(va[i].tolist(), vb[i].tolist(), vc[i].tolist())
+        normals[i] = bspv.normal
+        magnitudes[i] = bspv.magnitude
+    return normals, magnitudes
+
+
+def write_bsp_planes(flavors, offsets, normals, magnitudes):
+    """
+    Set values1 of BSP flavors (F05-F10)
+
+    :param dict[int, icr2model.flavor.flavor.BspFlavor] flavors:
+    :param list[int] offsets: offsets of flavors in order of ``normals``
+    :param numpy.ndarray normals: (N, 3)
+    :param numpy.ndarray magnitudes: (N,)
+    """
+    mags = np.asarray(magnitudes, np.int64).reshape(-1, 1).view(np.int32)  # native 2l
+    rows = np.hstack([np.asarray(normals, np.int64), mags]).tolist()
+    for o, row in zip(offsets, rows):
+        values = flavors[o].values1
+        values[:] = array(values.typecode, row)
@@ -0,0 +1,246 @@
+# coding: utf-8
+from .flavor import F00, Flavor, VertexFlavor
+from .value.values import CoordinateValues, UVValues
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+__all__ = ['VertexStore', 'VertexView']
+
+_LENGTHS = (4, 16, 20)  #: serialized vertex length by vtype
+
+
+class VertexStore:
+    """
+    Columnar storage of vertex values.
+    Coordinates are stored as (N, 3) int32 array and UVs as (N, 2) int16 array.
+    Parents of vertices are stored here too, so :class:`VertexView` holds only a row index.
+    """
+
+    def __init__(self, offsets=(), vtypes=(), coordinates=None, uvs=None):
+        """
+
+        :param offsets: Vertex offsets in ascending order (row -> offset)
+        :param vtypes: Vertex types (0, 1 or 2)
+        :param coordinates: (N, 3) array-like
+        :param uvs: (N, 2) array-like
+        """
+        if np is None:
+            raise ImportError('VertexStore requires numpy')
+        self.offsets = np.asarray(offsets, np.int32).reshape(-1)
+        self.vtypes = np.asarray(vtypes, np.int8).reshape(-1)
+        n = len(self.offsets)
+        self.coordinates = (np.zeros((n, 3), np.int32) if coordinates is None else
+                            np.asarray(coordinates, np.int32).reshape(n, 3))
+        self.uvs = (np.zeros((n, 2), np.int16) if uvs is None else
+                    np.asarray(uvs, np.int16).reshape(n, 2))
+        self.parents = [None] * n  # type: list[None | int | list[int]]  # same as Flavor._parents
+        self.container = None  # Flavors notified of value changes
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['container'] = None
+        return state
+
+    def row(self, offset):
+        """
+
+        :param int offset:
+        :rtype: int
+        """
+        row = int(np.searchsorted(self.offsets, offset))
+        if row == len(self) or self.offsets[row] != offset:
+            raise KeyError(offset)
+        return row
+
+    @classmethod
+    def from_flavors(cls, flavors):
+        """
+
+        :param dict[int, VertexFlavor] flavors: Vertex flavors
+        :rtype: VertexStore
+        """
+        fs = [flavors[o] for o in sorted(flavors)]
+        return cls([f.offset for f in fs],
+                   [f.vtype for f in fs],
+                   [f.values1 or (0, 0, 0) for f in fs],
+                   [f.values2 or (0, 0) for f in fs])
+
+    @classmethod
+    def from_body(cls, buffer, flavors):
+        """
+        Decode vertex values from the body buffer at once
+
+        :param buffer: Body buffer (offset 0 = body offset 0)
+        :param dict[int, VertexFlavor] flavors: Vertex flavors (only offsets and vtypes are used)
+        :rtype: VertexStore
+        """
+        offsets = sorted(flavors)
+        store = cls(offsets, [flavors[o].vtype for o in offsets])
+        words = np.frombuffer(buffer, np.int32, len(buffer) // 4)  # flavors are word aligned
+        pos = store.offsets // 4
+        has_co = store.vtypes > 0
+        store.coordinates[has_co] = words[pos[has_co, None] + np.arange(1, 4)]
+        has_uv = store.vtypes == 2
+        store.uvs[has_uv] = words[pos[has_uv] + 4].view(np.int16).reshape(-1, 2)
+        return store
+
+    def attach(self, flavors):
+        """
+        Replace vertex flavors of ``flavors`` with :class:`VertexView` objects over this store
+
+        :param Flavors flavors:
+        """
+        for row, o in enumerate(self.offsets.tolist()):
+            self.parents[row] = flavors[o]._parents
+            flavors[o] = VertexView(self, row)
+
+
+class _StoredCoordinates(CoordinateValues):
+    __slots__ = ()
+
+    def _changed(self):  # write in-place edit back to the store
+        self._owner.values1 = self
+
+
+class _StoredUVs(UVValues):
+    __slots__ = ()
+
+    def _changed(self):
+        self._owner.values2 = self
+
+
+class VertexView:
+    """
+    Vertex flavor whose values, vtype and parents live in a row of :class:`VertexStore`.
+    It has the same interface as :class:`icr2model.flavor.flavor.VertexFlavor`
+    and passes ``isinstance`` checks of it and :class:`icr2model.flavor.flavor.F00`
+    (but is not a subclass of them to keep only the store and the row).
+    :attr:`values1`/:attr:`values2` are copies of the row which write their changes back to it.
+    """
+    __slots__ = ('store', 'row')
+    TYPE = VertexFlavor.TYPE
+    _source = None  # never read lazily
+
+    def __init__(self, store, row):
+        """
+
+        :param VertexStore store:
+        :param int row:
+        """
+        self.store = store
+        self.row = row
+
+    @property
+    def __class__(self):  # isinstance() falls back to this
+        return F00
+
+    def __reduce__(self):
+        return VertexView, (self.store, self.row)
+
+    type = Flavor.type
+    co = VertexFlavor.co
+    uv = VertexFlavor.uv
+    to_bytes = Flavor.to_bytes
+    to_str = VertexFlavor.to_str
+    __eq__ = Flavor.__eq__
+    __hash__ = None
+
+    @property
+    def offset(self):
+        return int(self.store.offsets[self.row])
+
+    @property
+    def _container(self):
+        flavors = self.store.container
+        return flavors if flavors is not None and flavors.get(self.offset) is self else None
+
+    @_container.setter
+    def _container(self, flavors):
+        if flavors is not None:  # removed views are detected by the getter
+            self.store.container = flavors
+
+    def _changed(self):
+        flavors = self._container
+        if flavors is not None:
+            flavors._changed(self)
+
+    @property
+    def parents(self):
+        """
+
+        :rtype: list[int]
+        """
+        parents = self.store.parents[self.row]
+        if not isinstance(parents, list):
+            parents = self.store.parents[self.row] = [] if parents is None else [parents]
+        return parents
+
+    @parents.setter
+    def parents(self, parents):
+        self.store.parents[self.row] = list(parents)
+
+    def add_parent(self, parent):
+        """
+        See :meth:`icr2model.flavor.flavor.Flavor.add_parent`
+
+        :param int parent:
+        """
+        parents = self.store.parents[self.row]
+        if parents is None:
+            self.store.parents[self.row] = parent
+        elif isinstance(parents, list):
+            parents.append(parent)
+        else:
+            self.store.parents[self.row] = [parents, parent]
+
+    @property
+    def vtype(self):
+        return int(self.store.vtypes[self.row])
+
+    @vtype.setter
+    def vtype(self, vtype):
+        if vtype == 13:
+            vtype = 1
+        if vtype in (1, 2) and vtype > self.vtype:
+            self.store.vtypes[self.row] = vtype
+
+    @property
+    def values1(self):
+        """
+
+        :rtype: CoordinateValues
+        """
+        values = _StoredCoordinates(self.store.coordinates[self.row].tolist()
+                                    if self.vtype else ())
+        values._owner = self
+        return values
+
+    @values1.setter
+    def values1(self, values):
+        self.store.coordinates[self.row] = np.asarray(values, np.int32).reshape(3)
+        self._changed()
+
+    @property
+    def values2(self):
+        """
+
+        :rtype: UVValues
+        """
+        values = _StoredUVs(self.store.uvs[self.row].tolist() if self.vtype == 2 else ())
+        values._owner = self
+        return values
+
+    @values2.setter
+    def values2(self, values):
+        self.store.uvs[self.row] = np.asarray(values, np.int16).reshape(2)
+        self._changed()
+
+    @property
+    def length(self):
+        return _LENGTHS[self.vtype]
@@ -13,14 +13,68 @@ class ValuesLengthError(Exception):
     pass
 
 
-class Values(list):
+class Values(array):
+    """
+    Flavor values stored as C integers.
+    Lists are accepted where the values were lists before (slice assignment,
+    ``==``, ``+`` and ``+=``) but list only methods (e.g. ``sort``) aren't supported
+    and :func:`json.dumps` needs ``tolist()``.
+    """
+    __slots__ = ('_owner',)
     _TYPECODE = 'l'
 
+    def __new__(cls, values=()):
+        self = super().__new__(cls, cls._TYPECODE, values)
+        self._owner = None  # flavor notified of changes
+        return self
+
+    def __reduce_ex__(self, protocol):
+        return self.__class__, (self.tolist(),)
+
+    def _changed(self):
+        if self._owner is not None:
+            self._owner._changed()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice) and not isinstance(value, array):
+            value = array(self.typecode, value)
+        array.__setitem__(self, index, value)
+        self._changed()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return self.tolist() == other
+        return array.__eq__(self, other)
+
+    def __ne__(self, other):
+        if isinstance(other, list):
+            return self.tolist() != other
+        return array.__ne__(self, other)
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, list):
+            return self.tolist() + other
+        return array.__add__(self, other)
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + self.tolist()
+        return NotImplemented
+
     def read(self, stream, size):
-        self.extend(array(self._TYPECODE, stream.read(size)))
+        array.frombytes(self, stream.read(size))  # reading isn't a change
+
+    def read_from(self, buffer, offset, size):
+        array.frombytes(self, buffer[offset:offset + size])
 
     def to_bytes(self):
-        b = pack('{}{}'.format(len(self), self._TYPECODE), *self)
+        b = self.tobytes()
         if len(b) != self.length:
             raise ValuesLengthError
         return b
@@ -35,9 +89,28 @@ class Values(list):
         return self
 
 
+def _notifying(name):
+    method = getattr(array, name)
+
+    def func(self, *args):
+        result = method(self, *args)
+        self._changed()
+        return result
+
+    func.__name__ = name
+    return func
+
+
+for _name in ('__delitem__', '__imul__',
+              'append', 'extend', 'insert', 'pop', 'remove', 'reverse',
+              'byteswap', 'frombytes', 'fromlist'):  # mutating methods
+    setattr(Values, _name, _notifying(_name))
+
+
 class BspValues(Values):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
         if self:
             if len(self) < 3 or len(self) > 5:
                 raise ValuesLengthError(args, kwargs)
@@ -48,13 +121,13 @@ class BspValues(Values):
 
     @property
     def normal(self):
-        return self[:3]
+        return self[:3].tolist()
 
     @normal.setter
     def normal(self, values):
         if len(values) != 3:
             raise ValuesLengthError
-        self[:3] = values
+        self[:3] = array(self._TYPECODE, values)
 
     @property
     def magnitude(self):
@@ -66,7 +139,7 @@ class BspValues(Values):
 
         :param int val:
         """
-        self[3:] = unpack('2l', pack('q', val))
+        self[3:] = array(self._TYPECODE, unpack('2l', pack('q', val)))
 
     @property
     def length(self):
@@ -83,6 +156,7 @@ class BspValues(Values):
 
 
 class CoordinateValues(Values):
+    __slots__ = ()
     Coordinate = namedtuple('Coordinate', ['x', 'y', 'z'])
 
     @property
@@ -95,6 +169,7 @@ class CoordinateValues(Values):
 
 
 class UVValues(Values):
+    __slots__ = ()
     _TYPECODE = 'h'
     UV = namedtuple('UV', ['u', 'v'])
 
@@ -1,4 +1,5 @@
 # coding: utf-8
+from io import BytesIO
 from struct import unpack, pack
 from warnings import warn
 
@@ -18,16 +19,27 @@ class Header:
             names = (stream.read(8) for _ in range(num_files))
             self.files[ext] = [n.strip(NULL).decode() for n in names]
 
-    def to_bytes(self):
+    def write(self, stream):
+        """
+
+        :param stream: Writable binary stream
+        :return: Number of bytes written
+        :rtype: int
+        """
         files = [self.files[t] for t in EXT]
-        b = (pack('2l', *(self.body_length, self.root_offset)) +
-             pack('3l', *map(len, files)))
+        size = stream.write(pack('2l', *(self.body_length, self.root_offset)) +
+                            pack('3l', *map(len, files)))
         for names in files:
             for name in names:
                 if len(name) > 8:
                     warn('Long filename {} is renamed to {}'.format(name, name[:8]))
-                b += name[:8].encode().ljust(8, NULL)
-        return b
+                size += stream.write(name[:8].encode().ljust(8, NULL))
+        return size
+
+    def to_bytes(self):
+        st = BytesIO()
+        self.write(st)
+        return st.getvalue()
 
     def set_files(self, **files):
         warn('Use .files', DeprecationWarning)
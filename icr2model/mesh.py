@@ -0,0 +1,248 @@
+# coding: utf-8
+from collections import namedtuple
+
+from .flavor import Flavors, build_flavor
+from .flavor.flavor import FLAGS, F00, F01, F02, F04, F13, F16, FaceFlavor, RefFlavor
+from .flavor.store import VertexStore, VertexView
+from .flavor.value.values import CoordinateValues, UVValues
+from .stream import BufferStream
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+__all__ = ['Mesh', 'export_mesh', 'export_lods', 'import_mesh']
+
+
+class Mesh(namedtuple('Mesh', ['vertex_offsets', 'coordinates', 'uvs',
+                               'face_offsets', 'face_types', 'face_ptr', 'face_vertices',
+                               'colors', 'textures'])):
+    """
+    Geometry as numpy arrays.
+    Vertices are indexed densely (``vertex_offsets[i]`` is offset of vertex ``i``).
+    Vertices of face ``j`` are ``face_vertices[face_ptr[j]:face_ptr[j + 1]]``.
+    ``textures`` are mip indexes of the nearest F04 above faces (-1 if none),
+    a face shared by F04 of different mips is exported for each of them.
+    """
+    __slots__ = ()
+
+    def triangles(self):
+        """
+        Fan triangulation of faces
+
+        :return: (M, 3) vertex indexes and (M,) face indexes
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        sizes = np.diff(self.face_ptr)
+        tri_counts = (sizes - 2).clip(0)
+        faces = np.repeat(np.arange(len(sizes)), tri_counts)
+        firsts = self.face_ptr[faces]
+        seconds = firsts + np.arange(len(faces)) - np.repeat(np.cumsum(tri_counts) - tri_counts,
+                                                             tri_counts) + 1
+        tris = np.stack([self.face_vertices[firsts], self.face_vertices[seconds],
+                         self.face_vertices[seconds + 1]], axis=1)
+        return tris, faces
+
+
+def _faces(flavors, root, lod):
+    """
+    Walk from ``root`` to faces.
+    A face under F04 of different mip indexes is found once for each of them.
+
+    :return: Faces and mip indexes of them
+    :rtype: list[(FaceFlavor, int)]
+    """
+    found = []
+    seen = {(root, -1)}
+    stack = [(root, -1)]
+    while stack:
+        o, texture = stack.pop()
+        f = flavors[o]
+        if isinstance(f, FaceFlavor):
+            found.append((f, texture))
+            continue
+        if not isinstance(f, RefFlavor):
+            continue
+        if isinstance(f, F04):
+            texture = f.index
+        if isinstance(f, F13):
+            refs = f.children if lod is None else f.children[min(lod, len(f.children) - 1):][:1]
+        elif isinstance(f, F16):
+            refs = [f.next_offset, *f.children]
+        else:
+            refs = f.children.tolist()
+        for c in reversed(refs):
+            if c in flavors and (c, texture) not in seen:
+                seen.add((c, texture))
+                stack.append((c, texture))
+    return found
+
+
+def _vertex_values(flavors, offsets):
+    """
+
+    :return: (N, 3) coordinates and (N, 2) uvs of vertices
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    fs = [flavors[o] for o in offsets.tolist()]
+    if fs and all(isinstance(f, VertexView) for f in fs) and \
+            all(f.store is fs[0].store for f in fs):
+        store = fs[0].store
+        rows = np.array([f.row for f in fs], np.int64)
+        return store.coordinates[rows].astype(np.int64), store.uvs[rows].astype(np.int64)
+    co_null, uv_null = CoordinateValues((0, 0, 0)), UVValues((0, 0))  # for missing values
+    cos = b''.join((f.values1 or co_null).tobytes() for f in fs)
+    uvs = b''.join((f.values2 or uv_null).tobytes() for f in fs)
+    return (np.frombuffer(cos, 'i{}'.format(co_null.itemsize)).reshape(-1, 3).astype(np.int64),
+            np.frombuffer(uvs, 'i{}'.format(uv_null.itemsize)).reshape(-1, 2).astype(np.int64))
+
+
+def export_mesh(flavors, root, lod=None):
+    """
+    Export faces reachable from ``root`` and their vertices
+
+    :param icr2model.flavor.Flavors flavors:
+    :param int root: e.g. root offset of model or LOD manager
+    :param int lod: Index of children of distance switches (F13) to follow
+        (0: the nearest, clamped to the farthest). All children are followed if None.
+    :rtype: Mesh
+    """
+    if np is None:
+        raise ImportError('export_mesh requires numpy')
+    faces = _faces(flavors, root, lod)
+    sizes = [len(f.values2) for f, _ in faces]
+    flat = np.array([o for f, _ in faces for o in f.values2], np.int64)
+    vtx_os, face_vertices = np.unique(flat, return_inverse=True)
+    coordinates, uvs = _vertex_values(flavors, vtx_os)
+    face_ptr = np.zeros(len(faces) + 1, np.int64)
+    np.cumsum(sizes, out=face_ptr[1:])
+    return Mesh(vtx_os, coordinates, uvs,
+                np.array([f.offset for f, _ in faces], np.int64),
+                np.array([f.type for f, _ in faces], np.int8),
+                face_ptr, face_vertices.reshape(-1).astype(np.int64),
+                np.array([f.color for f, _ in faces], np.int64),
+                np.array([t for _, t in faces], np.int64))
+
+
+def export_lods(model, lod=None):
+    """
+    Export meshes of each LOD manager (F11 followed by F17) of a track
+
+    :param icr2model.model.Model model:
+    :param int lod: See :func:`export_mesh`
+    :return: Meshes by offsets of LOD managers
+    :rtype: dict[int, Mesh]
+    """
+    flavors = model.body.flavors
+    return {o: export_mesh(flavors, o, lod) for o in sorted(flavors._lod_offsets())}
+
+
+def _flag(type_):
+    return int(np.frombuffer(FLAGS[type_], np.int32)[0])
+
+
+def import_mesh(coordinates, face_ptr, face_vertices, uvs=None, colors=None, textures=None,
+                vertex_store=False):
+    """
+    Build a model from mesh arrays (e.g. of :class:`Mesh`).
+    Body is built as an array at once. A flavor object is still created for each
+    vertex and face, but without values, which are decoded from the body on access
+    (see :meth:`icr2model.flavor.flavor.Flavor.read_lazy`), or over a vertex store.
+    F11, F04 and F16 above faces (a few for each texture) are built one by one.
+
+    Layout is the same as :meth:`icr2model.model.Model.sorted` of flavors built by hand:
+    V02 (used by textured faces) and V01 vertices, F02 (textured) and F01 faces in the given order,
+    F11 of faces and F04 (``[index, 0]``) for each texture, F11 of untextured faces,
+    F11 of them and F16 root. Unused vertices are dropped.
+
+    :param coordinates: (N, 3) vertex coordinates
+    :param face_ptr: (M + 1,) vertices of face ``j`` are ``face_vertices[face_ptr[j]:face_ptr[j + 1]]``
+    :param face_vertices: Vertex indexes
+    :param uvs: (N, 2) vertex uvs (default: 0)
+    :param colors: (M,) face colors (default: 0)
+    :param textures: (M,) mip indexes of faces, -1 for untextured (default: -1)
+    :param bool vertex_store: See :meth:`icr2model.body.Body.read`
+    :rtype: icr2model.model.Model
+    """
+    from .model import Model
+    if np is None:
+        raise ImportError('import_mesh requires numpy')
+    coordinates = np.asarray(coordinates, np.int32).reshape(-1, 3)
+    uvs = np.zeros((len(coordinates), 2), np.int16) if uvs is None else \
+        np.asarray(uvs, np.int16).reshape(-1, 2)
+    face_ptr = np.asarray(face_ptr, np.int64)
+    face_vertices = np.asarray(face_vertices, np.int64)
+    sizes = np.diff(face_ptr)
+    colors = np.zeros(len(sizes), np.int64) if colors is None else np.asarray(colors, np.int64)
+    textures = np.full(len(sizes), -1, np.int64) if textures is None else \
+        np.asarray(textures, np.int64)
+    textured = textures >= 0
+    # vertices
+    vtypes = np.zeros(len(coordinates), np.int8)
+    vtypes[face_vertices] = 1
+    vtypes[face_vertices[np.repeat(textured, sizes)]] = 2
+    v02s, v01s = np.flatnonzero(vtypes == 2), np.flatnonzero(vtypes == 1)
+    vtx_os = np.full(len(coordinates), -1, np.int64)
+    vtx_os[v02s] = np.arange(len(v02s)) * 20
+    vtx_os[v01s] = len(v02s) * 20 + np.arange(len(v01s)) * 16
+    face_start = len(v02s) * 20 + len(v01s) * 16
+    # faces
+    head_sizes = np.where(textured, 4, 3)  # flag, (0,) color, num of vertices - 1
+    face_os = face_start + np.concatenate([[0], np.cumsum((head_sizes + sizes) * 4)])
+    face_os, face_end = face_os[:-1], int(face_os[-1])
+    # other flavors
+    tail = []  # type: list[icr2model.flavor.flavor.Flavor]
+    top_os = []
+    offset = face_end
+    groups = [(t, textures == t) for t in np.unique(textures[textured]).tolist()]
+    if not textured.all():
+        groups.append((-1, ~textured))
+    for t, is_group in groups:
+        os_ = face_os[is_group].tolist()
+        tail.append(build_flavor(11, offset, values1=[len(os_)], values2=os_))
+        offset += tail[-1].length
+        if t >= 0:
+            tail.append(build_flavor(4, offset, values1=[t, 0], values2=[tail[-1].offset]))
+            offset += tail[-1].length
+        top_os.append(tail[-1].offset)
+    tail.append(build_flavor(11, offset, values1=[len(top_os)], values2=top_os))
+    offset += tail[-1].length
+    tail.append(build_flavor(16, offset, values1=[tail[-1].offset, 0]))
+    body_length = offset + tail[-1].length
+    # body
+    words = np.zeros(body_length // 4, np.int32)
+    v02_words = words[:len(v02s) * 5].reshape(-1, 5)
+    v02_words[:, 1:4] = coordinates[v02s]
+    v02_words[:, 4] = uvs[v02s].view(np.int32).reshape(-1)
+    words[len(v02s) * 5:face_start // 4].reshape(-1, 4)[:, 1:4] = coordinates[v01s]
+    face_ws = face_os // 4
+    words[face_ws] = np.where(textured, _flag(2), _flag(1))
+    words[face_ws + head_sizes - 2] = colors
+    words[face_ws + head_sizes - 1] = sizes - 1
+    pos = np.repeat(face_ws + head_sizes - face_ptr[:-1], sizes) + np.arange(len(face_vertices))
+    words[pos] = vtx_os[face_vertices]
+    words[face_end // 4:] = np.frombuffer(b''.join(f.to_bytes() for f in tail), np.int32)
+    stream = BufferStream(words.tobytes())
+    # flavors
+    fs = {}
+    if vertex_store:
+        vtx_fs = np.concatenate([v02s, v01s])
+        store = VertexStore(vtx_os[vtx_fs], vtypes[vtx_fs], coordinates[vtx_fs], uvs[vtx_fs])
+        fs.update((o, VertexView(store, row)) for row, o in enumerate(store.offsets.tolist()))
+    else:
+        for vtype, vs in ((2, v02s), (1, v01s)):
+            for o in vtx_os[vs].tolist():
+                f = fs[o] = F00(o)
+                f.vtype = vtype
+                f.read_lazy(stream)
+    for o, t in zip(face_os.tolist(), textured.tolist()):
+        f = fs[o] = F02(o) if t else F01(o)
+        f.read_lazy(stream)
+    fs.update((f.offset, f) for f in tail)
+    m = Model()
+    m.body.flavors = Flavors(fs)
+    m.body.vertex_store = store if vertex_store else None
+    m.header.root_offset = tail[-1].offset
+    m.header.body_length = body_length
+    return m
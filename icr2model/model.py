@@ -1,9 +1,13 @@
 # coding: utf-8
+import os
 from io import BytesIO
+from mmap import ACCESS_READ, ACCESS_WRITE, mmap as map_file
 from warnings import warn
 
 from .body import Body
 from .header import Header
+from .profile import active, stage
+from .stream import BufferStream
 
 
 class Model:
@@ -11,22 +15,84 @@ class Model:
         self.path = path
         self.header = Header()
         self.body = Body()
+        self._stream = None  # kept for lazy reading
+        self._mmap = None
+        self._synced = None  # path of the file, flavors of which only dirty ones differ, gaps cleared
 
-    def read(self):
-        with open(self.path, 'rb') as f:
-            self.header.read(f)
-            st = BytesIO(f.read())
-        self.body.read(st, self.header.root_offset)
+    def read(self, mmap=False, vertex_store=False, lazy=False):
+        """
+
+        :param bool mmap:
+            A flag to map the file into memory and decode flavors from it directly
+            instead of loading a copy of the body
+        :param bool vertex_store: See :meth:`icr2model.body.Body.read`
+        :param bool lazy:
+            A flag to read only the flavor graph now and values of other flavors on access
+            (see :meth:`icr2model.body.Body.read`). The body is kept until :meth:`close`.
+        """
+        self.close()
+        with stage('read'):
+            with open(self.path, 'rb') as f:
+                self.header.read(f)
+                if mmap:
+                    self._mmap = map_file(f.fileno(), 0, access=ACCESS_READ)
+                    self._stream = BufferStream(self._mmap, f.tell())
+                else:
+                    self._stream = BytesIO(f.read())
+                size = f.seek(0, 2)
+            try:
+                self.body.read(self._stream, self.header.root_offset,
+                               vertex_store=vertex_store, lazy=lazy)
+            finally:
+                if not lazy:
+                    self.close()
+        self._sync(self.path, False)
+        prof = active()
+        if prof is not None:
+            prof.bytes_read += size
+            prof.count_flavors(self.body.flavors)
+
+    def _sync(self, path, cleared=True):
+        """
 
-    def sorted(self, optimize=True):
+        :param str path: File of which contents are same as this model
+        :param bool cleared: A flag whether the file has no data between flavors like :meth:`write`
+        """
+        self._synced = os.path.abspath(path), self.body.flavors, cleared
+        self.body.flavors.mark_clean()
+
+    def load(self):
+        """
+        Read values of flavors not accessed yet and release the body kept for lazy reading
+        """
+        for f in self.body.flavors.values():
+            if f._source is not None:
+                f._decode()
+        self.close()
+
+    def close(self):
+        """
+        Release the body kept for lazy reading.
+        Values of flavors not accessed yet can't be read after closing.
+        """
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def sorted(self, optimize=True, merge_subgraphs=False):
         """
 
         :param bool optimize: See description of param ``optimize`` of :meth:`icr2model.flavor.Flavors.sorted`
+        :param bool merge_subgraphs: See :meth:`icr2model.flavor.Flavors.sorted`
         :return: New model object
         :rtype: Model
         """
         new_m = Model()
-        new_m.body.flavors = self.body.flavors.sorted(optimize)
+        with stage('sorted'):
+            new_m.body.flavors = self.body.flavors.sorted(optimize, merge_subgraphs)
         root_offset = max(new_m.body.flavors)
         new_m.header.root_offset = root_offset
         new_m.header.body_length = root_offset + new_m.body.flavors[root_offset].length
@@ -35,28 +101,138 @@ class Model:
                 root_offset + new_m.body.flavors[root_offset].length)
         return new_m
 
-    def sort(self, optimize=True):
+    def sort(self, optimize=True, merge_subgraphs=False):
         """
 
         :param bool optimize: See description of param ``optimize`` of :meth:`icr2model.flavor.Flavors.sorted`
+        :param bool merge_subgraphs: See :meth:`icr2model.flavor.Flavors.sorted`
         :return:
         """
-        new_m = self.sorted(optimize)
+        new_m = self.sorted(optimize, merge_subgraphs)
         self.header = new_m.header
         self.body = new_m.body
 
+    def diff(self, other):
+        """
+        See :meth:`icr2model.flavor.Flavors.diff`
+
+        :param Model other:
+        :rtype: icr2model.flavor.Diff
+        """
+        return self.body.flavors.diff(other.body.flavors,
+                                      self.header.root_offset, other.header.root_offset)
+
+    def extract(self, offset):
+        """
+        Standalone model of a flavor and flavors reachable from it (e.g. a track section).
+        F17 are not included.
+
+        :param int offset:
+        :rtype: Model
+        """
+        m = Model()
+        m.body.flavors = self.body.flavors.graph().subgraph(offset)
+        m.header.files = self.header.files
+        return m.sorted(False)
+
     def to_bytes(self):
-        return self.header.to_bytes() + self.body.to_bytes()
+        b = self.header.to_bytes() + self.body.to_bytes()
+        prof = active()
+        if prof is not None:
+            prof.bytes_written += len(b)
+        return b
+
+    def write(self, stream):
+        """
+        Write header and body to ``stream`` without building whole output in memory
+
+        :param stream: Writable binary stream
+        :return: Number of bytes written
+        :rtype: int
+        """
+        size = self.header.write(stream) + self.body.write(stream)
+        prof = active()
+        if prof is not None:
+            prof.bytes_written += size
+        return size
+
+    def save(self, path=None, patch=False):
+        """
+
+        :param str path: Output path (default: :attr:`path`)
+        :param bool patch:
+            A flag to write only changed flavors into the file in place (through mmap)
+            if the file is the one this model was read from or saved to last,
+            the header is not changed and the flavors fit in their places
+            (see :meth:`icr2model.body.Body.patch`). Whole file is written otherwise.
+        :return: True if patched
+        :rtype: bool
+        """
+        path = path or self.path
+        patched = patch and self._patch(path)
+        if not patched:
+            if (self._mmap is not None and os.path.isfile(path) and
+                    os.path.samefile(path, self.path)):
+                self.load()  # the mapped file is truncated by writing
+            with open(path, 'wb') as f:
+                self.write(f)
+        self._sync(path)
+        return patched
+
+    def _patch(self, path):
+        if self._synced is None or not os.path.isfile(path):
+            return False
+        synced_path, synced_flavors, cleared = self._synced
+        if os.path.abspath(path) != synced_path or self.body.flavors is not synced_flavors:
+            return False
+        header = self.header.to_bytes()
+        with stage('patch'), open(path, 'r+b') as f:
+            if f.read(len(header)) != header:
+                return False
+            with map_file(f.fileno(), 0, access=ACCESS_WRITE) as mm:
+                body = memoryview(mm)[len(header):]
+                try:
+                    patched = ((cleared or self.body.clear_gaps(body)) and
+                               self.body.patch(body, self.body.flavors.dirty))
+                finally:
+                    body.release()
+                if patched:
+                    mm.flush()
+        return patched
 
     def is_track(self):
         return self.body.flavors.has_types(12, 17)
 
     @classmethod
-    def open(cls, path):
+    def open(cls, path, mmap=False, vertex_store=False, lazy=False, cache=None):
+        """
+
+        :param str path:
+        :param bool mmap: See :meth:`Model.read`
+        :param bool vertex_store:
+            See :meth:`Model.read`. Vertices are :class:`icr2model.flavor.store.VertexView`
+            which pass ``isinstance`` checks of :class:`icr2model.flavor.flavor.VertexFlavor`
+            but ``type()`` of them differs and their values are copies of the store
+            (changes are written back to it).
+        :param bool lazy: See :meth:`Model.read`
+        :param icr2model.cache.ModelCache cache:
+            Cache to load the model from or store it to. Can't be used with other options.
+        :rtype: Model
+        """
+        if cache is not None:
+            if mmap or vertex_store or lazy:
+                raise ValueError('cache can not be used with mmap, vertex_store or lazy')
+            return cache.open(path)
         m = cls(path)
-        m.read()
+        m.read(mmap, vertex_store, lazy)
         return m
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def optimized(self):
         warn('Use .sorted()', DeprecationWarning)
         with self.body.flavors:
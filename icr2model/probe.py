@@ -0,0 +1,115 @@
+# coding: utf-8
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from mmap import ACCESS_READ, mmap as map_file
+
+from .batch import expand_paths
+from .flavor import build_flavor
+from .flavor.flavor import FLAGS, F11, F13, F16
+from .header import Header
+from .stream import BufferStream
+
+__all__ = ['Probe', 'probe', 'probe_all']
+
+TRACK, CAR, OBJECT = 'track', 'car', 'object'
+
+
+class Probe(namedtuple('Probe', ['path', 'kind', 'body_length', 'root_offset', 'files',
+                                 'types', 'complete', 'error'])):
+    """
+    Metadata of a model file.
+    ``types`` are flavor counts by type of visited flavors
+    (F17 are counted on visiting their LOD managers),
+    ``complete`` is False if the walk was stopped by ``max_flavors``.
+    """
+
+    def is_track(self):
+        return self.kind == TRACK
+
+
+def _walk(st, root_offset, max_flavors):
+    """
+    Breadth-first walk from the root reading only flags and references
+
+    :param st: Body stream
+    :param int root_offset:
+    :param int max_flavors:
+    :return: Flavor counts by type and a flag whether all flavors were visited
+    :rtype: (collections.Counter, bool)
+    """
+    types = Counter()
+    seen = {root_offset}
+    queue = deque([root_offset])
+    while queue:
+        if max_flavors is not None and max_flavors <= len(seen) - len(queue):  # visited
+            return types, False
+        offset = queue.popleft()
+        st.seek(offset)
+        type_ = FLAGS.index(bytes(st.read(4)))
+        types[type_] += 1
+        if type_ in (0, 3, 12, 14, 15, 17, 18):  # no references
+            continue
+        f = build_flavor(type_, offset)
+        f.read(st)
+        refs = list(f.children)
+        if isinstance(f, F13):
+            refs = f.children + [f.origin]
+        elif isinstance(f, F16):
+            refs.append(f.next_offset)
+        elif isinstance(f, F11) and st.read(4) == FLAGS[17]:  # LOD manager of track
+            types[17] += 1
+        for o in refs:
+            if o >= 0 and o not in seen:
+                seen.add(o)
+                queue.append(o)
+    return types, True
+
+
+def probe(path, max_flavors=4096):
+    """
+    Read the header and walk the body from the root up to ``max_flavors`` flavors.
+    Only visited flavors are read (by memory-mapping the file).
+
+    A model is regarded as a track if it has F12 or F17 (placed right after each LOD manager,
+    so a track is recognized within a few levels from the root),
+    as a car if it refers pmp files or has F18, and as an object otherwise.
+
+    :param str path:
+    :param int max_flavors: Maximum number of flavors to visit (None: no limit)
+    :rtype: Probe
+    """
+    header = Header()
+    try:
+        with open(path, 'rb') as f:
+            header.read(f)
+            with map_file(f.fileno(), 0, access=ACCESS_READ) as mm:
+                with BufferStream(mm, f.tell()) as st:
+                    types, complete = _walk(st, header.root_offset, max_flavors)
+    except Exception as e:
+        return Probe(path, None, header.body_length, header.root_offset, header.files,
+                     {}, False, '{}: {}'.format(type(e).__name__, e))
+    kind = (TRACK if types[12] or types[17] else
+            CAR if header.files.get('pmp') or types[18] else
+            OBJECT)
+    return Probe(path, kind, header.body_length, header.root_offset, header.files,
+                 dict(types), complete, None)
+
+
+def probe_all(paths, max_flavors=4096, workers=None):
+    """
+    :func:`probe` files in parallel
+
+    :param paths: File paths and/or glob patterns
+    :param int max_flavors: See :func:`probe`
+    :param int workers: Number of worker processes (default: number of CPUs).
+        Files are probed in this process if 1.
+    :return: Results in order of the (expanded) paths
+    :rtype: collections.Iterator[Probe]
+    """
+    paths = expand_paths(paths)
+    if workers == 1:
+        for p in paths:
+            yield probe(p, max_flavors)
+        return
+    with ProcessPoolExecutor(workers) as ex:
+        yield from ex.map(probe, paths, [max_flavors] * len(paths), chunksize=16)
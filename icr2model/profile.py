@@ -0,0 +1,141 @@
+# coding: utf-8
+import threading
+from collections import Counter
+from time import perf_counter
+
+__all__ = ['Profiler', 'active', 'stage']
+
+_local = threading.local()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        p = self.profiler
+        p.times[self.name] += perf_counter() - self.start
+        p.calls[self.name] += 1
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Records wall time of stages (inclusive), flavor counts by type and bytes read/written
+    of models processed in the ``with`` block (in the current thread).
+
+    >>> with Profiler() as p:  # doctest: +SKIP
+    ...     Model.open(path).sorted().save(out_path)
+    >>> p.report()  # doctest: +SKIP
+    {'times': {'read': 0.1, 'read_flavor': 0.09, ...}, 'calls': {...},
+     'flavors': {0: 1200, 1: 300, ...}, 'bytes_read': 40000, 'bytes_written': 32000}
+    """
+
+    def __init__(self, callback=None):
+        """
+
+        :param callback: Called with :meth:`report` on exit of the ``with`` block
+        """
+        self.callback = callback
+        self.times = Counter()  # type: dict[str, float]  # seconds by stage
+        self.calls = Counter()  # type: dict[str, int]
+        self.flavors = Counter()  # type: dict[int, int]  # flavor counts by type
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = active()
+        _local.profiler = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.profiler, self._outer = self._outer, None
+        if self.callback is not None:
+            self.callback(self.report())
+
+    def stage(self, name):
+        """
+
+        :param str name:
+        :return: Context manager to time a stage
+        """
+        return _Stage(self, name)
+
+    def count_flavors(self, flavors):
+        """
+
+        :param icr2model.flavor.Flavors flavors:
+        """
+        for t in range(19):
+            n = len(flavors._by_type.get(t, ()))
+            if n:
+                self.flavors[t] += n
+
+    def report(self):
+        """
+
+        :return: Plain dict which can be serialized (to json etc.) and :meth:`aggregate` -d
+        :rtype: dict
+        """
+        return {'times': dict(self.times),
+                'calls': dict(self.calls),
+                'flavors': dict(self.flavors),
+                'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written}
+
+    @staticmethod
+    def aggregate(reports):
+        """
+
+        :param reports: Reports of :meth:`report`
+        :return: Sum of ``reports``
+        :rtype: dict
+        """
+        p = Profiler()
+        for r in reports:
+            p.times.update(r['times'])
+            p.calls.update(r['calls'])
+            p.flavors.update({int(t): n for t, n in r['flavors'].items()})
+            p.bytes_read += r['bytes_read']
+            p.bytes_written += r['bytes_written']
+        return p.report()
+
+
+def active():
+    """
+
+    :return: Profiler of the current thread if profiling
+    :rtype: Profiler
+    """
+    return getattr(_local, 'profiler', None)
+
+
+def stage(name):
+    """
+    Time a stage with the active profiler (does nothing if not profiling)
+
+    :param str name:
+    :return: Context manager
+    """
+    p = getattr(_local, 'profiler', None)
+    return _NULL_STAGE if p is None else _Stage(p, name)
@@ -0,0 +1,59 @@
+# coding: utf-8
+
+__all__ = ['BufferStream']
+
+
+class BufferStream:
+    """
+    Read-only binary stream over a buffer (``bytes``, ``mmap``, ...).
+    :meth:`read` returns :class:`memoryview` slices of the buffer instead of copies.
+    """
+
+    def __init__(self, buffer, offset=0):
+        """
+
+        :param buffer: Object supporting the buffer protocol
+        :param int offset: Position of the buffer regarded as position 0 of the stream
+        """
+        self._view = memoryview(buffer)[offset:]
+        self._pos = 0
+
+    def seek(self, offset, whence=0):
+        self._pos = (offset if whence == 0 else
+                     self._pos + offset if whence == 1 else
+                     len(self._view) + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, size=-1):
+        """
+
+        :param int size:
+        :return: Zero-copy slice of the buffer
+        :rtype: memoryview
+        """
+        start = self._pos
+        self._pos = len(self._view) if size < 0 else min(start + size, len(self._view))
+        return self._view[start:self._pos]
+
+    def getbuffer(self):
+        """
+
+        :return: Whole buffer of the stream
+        :rtype: memoryview
+        """
+        return self._view[:]
+
+    def close(self):
+        self._view.release()
+
+    def __len__(self):
+        return len(self._view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -9,5 +9,6 @@ setup(
     author='nooRok',
     author_email='',
     description='ICR2 3do model',
-    python_requires='>=3.5'
+    python_requires='>=3.5',
+    extras_require={'numpy': ['numpy']}
 )
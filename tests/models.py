@@ -0,0 +1,118 @@
+# coding: utf-8
+import unittest
+from array import array
+
+from icr2model.flavor import Flavors, build_flavor
+from icr2model.model import Model
+
+#: The model format is read and written with native ``long`` (4 bytes on Windows)
+skip_unless_long32 = unittest.skipUnless(array('l').itemsize == 4,
+                                         'model format requires 4 byte native long')
+
+
+class Builder:
+    def __init__(self):
+        self.offset = 0
+        self.flavors = {}
+
+    def add(self, type_, values1, values2=()):
+        f = build_flavor(type_, self.offset, values1=values1, values2=values2)
+        self.flavors[f.offset] = f
+        self.offset += f.length
+        return f.offset
+
+
+def build_object(sections=3):
+    """
+    Object model with vertices, faces, textures, a distance switch and leaf flavors.
+    Flavors are placed in reference order (children before parents) without gaps
+    and all of them are referred, so the model is written to the same bytes once read.
+
+    :param int sections:
+    :rtype: Model
+    """
+    b = Builder()
+    v02s = [b.add(0, [i * 1000, -i * 1000, i], [i % 8, i % 5]) for i in range(sections + 3)]
+    v01s = [b.add(0, [i * 500, i * 500, -i]) for i in range(sections + 2)]
+    section_os = []
+    for i in range(sections):
+        f02 = b.add(2, [0, 10 + i, 3], [v02s[(i + k) % len(v02s)] for k in range(4)])
+        f01 = b.add(1, [20 + i, 2], [v01s[(i + k) % len(v01s)] for k in range(3)])
+        faces = b.add(11, [2], [f02, f01])
+        f04 = b.add(4, [i, 0], [faces])
+        switch = b.add(13, [v01s[i % len(v01s)]], [900, f04, 0, faces])
+        f15 = b.add(15, [i, 2, 3, 4, 5, 6, i])
+        f14 = b.add(14, [2], [1, 2, 3, 4])
+        section_os.append(b.add(11, [3], [switch, f15, f14]))
+    root_list = b.add(11, [len(section_os)], section_os)
+    root = b.add(16, [root_list, 0])
+    m = Model()
+    m.body.flavors = Flavors(b.flavors)
+    m.header.root_offset = root
+    m.header.body_length = b.offset
+    m.header.files = {'mip': ['a', 'b', 'c'], 'pmp': [], '3do': []}
+    return m
+
+
+def build_twins():
+    """
+    Object model with two identical sections of which flavors are different but identical
+    (their vertices are identical only by coordinates), so ``sorted(True)`` merges
+    only some of their flavors and ``sorted(merge_subgraphs=True)`` merges the sections.
+
+    :rtype: Model
+    """
+    b = Builder()
+    section_os = []
+    for _ in range(2):
+        v01s = [b.add(0, [i * 500, i * 500, -i]) for i in range(3)]
+        f01 = b.add(1, [20, 2], v01s)
+        faces = b.add(11, [1], [f01])
+        f04 = b.add(4, [1, 0], [faces])
+        f15 = b.add(15, [1, 2, 3, 4, 5, 6, 7])
+        section_os.append(b.add(11, [2], [f04, f15]))
+    root_list = b.add(11, [len(section_os)], section_os)
+    root = b.add(16, [root_list, 0])
+    m = Model()
+    m.body.flavors = Flavors(b.flavors)
+    m.header.root_offset = root
+    m.header.body_length = b.offset
+    m.header.files = {'mip': ['a'], 'pmp': [], '3do': []}
+    return m
+
+
+def build_shared_faces(indexes=(1, 2, 1)):
+    """
+    Object model of which faces (an F11 of an F02 and an F01) are referred by F04 of ``indexes``
+
+    :param indexes: Mip indexes of F04
+    :rtype: Model
+    """
+    b = Builder()
+    vertices = [b.add(0, [i * 100, 0, i], [i, i]) for i in range(4)]
+    f02 = b.add(2, [0, 10, 3], vertices)
+    f01 = b.add(1, [20, 2], vertices[:3])
+    faces = b.add(11, [2], [f02, f01])
+    f04s = [b.add(4, [i, 0], [faces]) for i in indexes]
+    root_list = b.add(11, [len(f04s)], f04s)
+    root = b.add(16, [root_list, 0])
+    m = Model()
+    m.body.flavors = Flavors(b.flavors)
+    m.header.root_offset = root
+    m.header.body_length = b.offset
+    m.header.files = {'mip': ['a', 'b', 'c'], 'pmp': [], '3do': []}
+    return m
+
+
+def write_object(path, sections=3):
+    """
+
+    :param str path:
+    :param int sections:
+    :return: Written bytes
+    :rtype: bytes
+    """
+    data = build_object(sections).to_bytes()
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
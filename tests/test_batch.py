@@ -0,0 +1,42 @@
+# coding: utf-8
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from icr2model.batch import process
+from icr2model.model import Model
+
+from .models import skip_unless_long32, write_object
+
+
+@skip_unless_long32
+class ProcessTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.input_dir = os.path.join(self._dir.name, 'tracks')
+        self.paths = []
+        for name, sections in (('a', 2), ('b', 3)):
+            os.makedirs(os.path.join(self.input_dir, name))
+            path = os.path.join(self.input_dir, name, 'car.3do')
+            write_object(path, sections)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_same_names(self):
+        output_dir = os.path.join(self._dir.name, 'out', 'sorted')  # not created yet
+        pattern = os.path.join(self.input_dir, '**', '*.3do')
+        results = list(process([pattern], output_dir, workers=1))
+        self.assertEqual([r.error for r in results], [None, None])
+        self.assertEqual([r.path for r in results], self.paths)
+        for r, name in zip(results, 'ab'):
+            self.assertEqual(r.output, os.path.join(output_dir, name, 'car.3do'))
+            self.assertEqual(Model.open(r.output).to_bytes(),
+                             Model.open(r.path).sorted(True).to_bytes())
+
+    def test_single_file(self):
+        output_dir = os.path.join(self._dir.name, 'out')
+        r, = process(self.paths[:1], output_dir, workers=1)
+        self.assertIsNone(r.error)
+        self.assertEqual(r.output, os.path.join(output_dir, 'car.3do'))
@@ -0,0 +1,75 @@
+# coding: utf-8
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from icr2model.cache import EXT, ModelCache
+from icr2model.model import Model
+
+from .models import skip_unless_long32, write_object
+
+
+@skip_unless_long32
+class ModelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'model.3do')
+        self.data = write_object(self.path, sections=5)
+        self.cache = ModelCache(os.path.join(self._dir.name, 'cache'))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _entry(self):
+        names = [n for n in os.listdir(self.cache.directory) if n.endswith(EXT)]
+        self.assertEqual(len(names), 1)
+        return os.path.join(self.cache.directory, names[0])
+
+    def assertSameModel(self, m, expected):
+        self.assertEqual(m.to_bytes(), expected.to_bytes())
+        fs, expected_fs = m.body.flavors, expected.body.flavors
+        self.assertEqual(sorted(fs), sorted(expected_fs))
+        for o in expected_fs:
+            self.assertEqual(fs[o].parents, expected_fs[o].parents, o)
+
+    def test_round_trip(self):
+        expected = Model.open(self.path)
+        self.assertSameModel(self.cache.open(self.path), expected)  # miss
+        self.assertIsNotNone(self.cache.load(ModelCache.key(self.data), self.path))
+        self.assertSameModel(self.cache.open(self.path), expected)  # hit
+        self.assertEqual(self.cache.open(self.path).to_bytes(), self.data)
+
+    def test_truncated_entry(self):
+        self.cache.open(self.path)
+        entry = self._entry()
+        with open(entry, 'rb') as f:
+            encoded = f.read()
+        key = ModelCache.key(self.data)
+        expected = Model.open(self.path)
+        sizes = set(range(0, len(encoded), 4)) | set(range(1, 40)) | {len(encoded) - 1}
+        for size in sorted(sizes):
+            with self.subTest(size=size):
+                with open(entry, 'wb') as f:
+                    f.write(encoded[:size])
+                self.assertIsNone(self.cache.load(key, self.path))
+                self.assertFalse(os.path.exists(entry))  # removed
+                self.assertSameModel(self.cache.open(self.path), expected)  # re-parsed
+
+    def test_corrupt_table(self):
+        self.cache.open(self.path)
+        entry = self._entry()
+        with open(entry, 'rb') as f:
+            encoded = bytearray(f.read())
+        encoded[-4:] = b'\xff\xff\xff\x7f'  # size of the last value of the last flavor
+        with open(entry, 'wb') as f:
+            f.write(encoded)
+        self.assertIsNone(self.cache.load(ModelCache.key(self.data), self.path))
+        self.assertFalse(os.path.exists(entry))
+        self.assertEqual(self.cache.open(self.path).to_bytes(), self.data)
+
+    def test_modified_file(self):
+        self.cache.open(self.path)
+        m = Model.open(self.path)
+        next(iter(m.body.flavors.by_types(15).values())).values1[0] += 100
+        m.save()
+        self.assertSameModel(self.cache.open(self.path), Model.open(self.path))
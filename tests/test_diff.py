@@ -0,0 +1,49 @@
+# coding: utf-8
+import unittest
+
+from .models import build_object, skip_unless_long32
+
+
+@skip_unless_long32
+class DiffTest(unittest.TestCase):
+    def setUp(self):
+        self.fs = build_object().body.flavors
+        self.other = build_object().body.flavors
+        self.f15_o = next(iter(self.other.by_types(15)))
+
+    def test_identical(self):
+        self.assertFalse(self.fs.diff(self.other))
+
+    def test_changed(self):
+        self.other[self.f15_o].values1[0] += 1
+        d = self.fs.diff(self.other)
+        self.assertEqual(d.changed, [(self.f15_o, self.f15_o)])
+        self.assertFalse(d.added or d.removed or d.redirected)
+
+    def test_hash_collision(self):
+        self.other[self.f15_o].values1[0] += 1
+        root = max(self.other)
+        self.other._tree_keys(root).update(self.fs._tree_keys(root))  # all keys collide
+        d = self.fs.diff(self.other)
+        self.assertEqual(d.changed, [(self.f15_o, self.f15_o)])
+        self.assertFalse(d.added or d.removed or d.redirected)
+
+    def test_redirected(self):
+        f04_os = sorted(self.other.by_types(4))
+        f04, moved_f04 = self.other[f04_os[0]], self.other[f04_os[1]]
+        moved_f04.values2[0] = f04.values2[0]  # refer faces of another texture
+        d = self.fs.diff(self.other)
+        self.assertEqual([r[:2] for r in d.redirected], [(f04_os[1], f04_os[1])])
+        self.assertFalse(d.changed or d.added or d.removed)  # faces are still referred by F13
+
+    def test_redirect_hash_collision(self):
+        faces_os = sorted(o for o, f in self.other.by_types(11).items()
+                          if self.other[f.values2[0]].type == 2)
+        f01_o = self.other[faces_os[1]].values2[1]
+        self.other[f01_o].values1[0] += 1
+        root = max(self.other)
+        keys = self.other._tree_keys(root)
+        keys[faces_os[1]] = self.fs._tree_keys(root)[faces_os[0]]  # collides with other faces
+        d = self.fs.diff(self.other)
+        self.assertFalse(d.redirected)
+        self.assertEqual(d.changed, [(f01_o, f01_o)])
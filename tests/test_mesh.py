@@ -0,0 +1,72 @@
+# coding: utf-8
+import unittest
+
+from icr2model.flavor import Flavors
+from icr2model.mesh import export_mesh, import_mesh
+from icr2model.model import Model
+
+from .models import Builder, build_shared_faces, skip_unless_long32
+
+try:
+    import numpy
+except ImportError:  # optional
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'requires numpy')
+class ExportTest(unittest.TestCase):
+    def test_shared_faces(self):
+        m = build_shared_faces((1, 2, 1))
+        fs = m.body.flavors
+        mesh = export_mesh(fs, m.header.root_offset)
+        face_os = sorted(fs.by_types(1, 2))
+        self.assertEqual(len(mesh.face_offsets), 4)  # once for each mip
+        self.assertEqual(sorted(zip(mesh.face_offsets.tolist(), mesh.textures.tolist())),
+                         [(o, t) for o in face_os for t in (1, 2)])
+        self.assertEqual(len(mesh.vertex_offsets), 4)
+        self.assertEqual(sorted(numpy.diff(mesh.face_ptr).tolist()), [3, 3, 4, 4])
+
+
+@skip_unless_long32
+@unittest.skipIf(numpy is None, 'requires numpy')
+class ImportTest(unittest.TestCase):
+    coordinates = [[i * 100, -i * 10, i] for i in range(6)]  # the last one isn't used
+    uvs = [[i, -i] for i in range(6)]
+    face_ptr = [0, 3, 6, 10]
+    face_vertices = [0, 1, 2, 1, 3, 4, 2, 0, 4, 1]
+    colors = [7, 8, 9]
+    textures = [2, -1, 1]
+
+    def build_by_hand(self):
+        """Flavors of the mesh with vertices in index order (V01 and V02 are mixed)"""
+        b = Builder()
+        textured_vs = {v for j, t in enumerate(self.textures) if t >= 0
+                       for v in self.face_vertices[self.face_ptr[j]:self.face_ptr[j + 1]]}
+        vtx_os = {}
+        for v in sorted(set(self.face_vertices)):
+            vtx_os[v] = b.add(0, self.coordinates[v], self.uvs[v] if v in textured_vs else ())
+        face_os = []
+        for j, (color, t) in enumerate(zip(self.colors, self.textures)):
+            vs = [vtx_os[v] for v in self.face_vertices[self.face_ptr[j]:self.face_ptr[j + 1]]]
+            face_os.append(b.add(2, [0, color, len(vs) - 1], vs) if t >= 0 else
+                           b.add(1, [color, len(vs) - 1], vs))
+        top_os = []
+        for t in (1, 2, -1):
+            os_ = [o for o, t_ in zip(face_os, self.textures) if t_ == t]
+            top_os.append(b.add(11, [len(os_)], os_))
+            if t >= 0:
+                top_os[-1] = b.add(4, [t, 0], [top_os[-1]])
+        root = b.add(16, [b.add(11, [len(top_os)], top_os), 0])
+        m = Model()
+        m.body.flavors = Flavors(b.flavors)
+        m.header.root_offset = root
+        m.header.body_length = b.offset
+        return m
+
+    def test_layout(self):
+        expected = self.build_by_hand().sorted().to_bytes()
+        for vertex_store in (False, True):
+            with self.subTest(vertex_store=vertex_store):
+                m = import_mesh(self.coordinates, self.face_ptr, self.face_vertices,
+                                self.uvs, self.colors, self.textures, vertex_store)
+                self.assertEqual(m.to_bytes(), expected)
@@ -0,0 +1,165 @@
+# coding: utf-8
+import os
+import unittest
+from io import BytesIO
+from tempfile import TemporaryDirectory
+
+from icr2model.model import Model
+from icr2model.profile import Profiler
+
+from .models import build_object, skip_unless_long32, write_object
+
+try:
+    import numpy
+except ImportError:  # optional
+    numpy = None
+
+
+@skip_unless_long32
+class PatchSaveTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'model.3do')
+        self.data = write_object(self.path)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _read(self, path=None):
+        with open(path or self.path, 'rb') as f:
+            return f.read()
+
+    def assertPatched(self, m, patched=True, reread=True):
+        """Patched (or fully written) file must be the same as a full write"""
+        full_path = os.path.join(self._dir.name, 'full.3do')
+        with open(full_path, 'wb') as f:
+            m.write(f)
+        self.assertIs(m.save(patch=True), patched)
+        self.assertEqual(self._read(), self._read(full_path))
+        self.assertFalse(m.body.flavors.dirty)
+        if reread:
+            self.assertEqual(Model.open(self.path).to_bytes(), self._read(full_path))
+
+    def _edit(self, m):
+        fs = m.body.flavors
+        next(iter(fs.by_types(15).values())).values1[0] += 100  # fixed length
+        next(iter(fs.by_types(4).values())).values1[0] += 1
+        face = next(iter(fs.by_types(1).values()))
+        face.values1[0] = 7  # color
+        vertex = fs[face.values2[0]]
+        vertex.values1[2] -= 3
+
+    def test_unchanged(self):
+        m = Model.open(self.path)
+        self.assertPatched(m)
+        self.assertEqual(self._read(), self.data)
+
+    def test_fixed_length(self):
+        for options in ({}, {'mmap': True}, {'lazy': True}, {'mmap': True, 'lazy': True}):
+            with self.subTest(**options):
+                write_object(self.path)
+                with Model.open(self.path, **options) as m:
+                    self._edit(m)
+                    self.assertTrue(m.body.flavors.dirty)
+                    self.assertPatched(m)
+                    self.assertNotEqual(self._read(), self.data)
+
+    @unittest.skipIf(numpy is None, 'requires numpy')
+    def test_vertex_store(self):
+        m = Model.open(self.path, vertex_store=True)
+        self._edit(m)
+        self.assertPatched(m)
+
+    def test_shrunk_and_restored(self):
+        m = Model.open(self.path)
+        f11 = next(f for f in m.body.flavors.by_types(11).values() if len(f.children) > 1)
+        last = f11.values2.pop()
+        f11.values1[0] -= 1
+        self.assertPatched(m, reread=False)  # the removed child is not read again
+        f11.values2.append(last)
+        f11.values1[0] += 1
+        self.assertPatched(m)
+        self.assertEqual(self._read(), self.data)
+
+    def test_grown(self):
+        m = Model.open(self.path)
+        root = m.body.flavors[m.header.root_offset]  # the last flavor
+        root.values2.append(root.values1[0])
+        root.values1[1] += 1
+        m.header.body_length += 4
+        self.assertPatched(m, False)  # header is changed
+
+    def test_fixed_type_grown(self):
+        m = Model.open(self.path)
+        f04 = next(iter(m.body.flavors.by_types(4).values()))
+        f04.values2.append(f04.values2[0])  # reaches the next flavor
+        body = bytearray(self.data[len(m.header.to_bytes()):])
+        self.assertFalse(m.body.patch(body, m.body.flavors.dirty))
+        self.assertEqual(body, self.data[len(m.header.to_bytes()):])
+
+    def test_fixed_type_shrunk(self):
+        m = Model.open(self.path)
+        f04 = next(iter(m.body.flavors.by_types(4).values()))
+        f04.values2.pop()
+        self.assertPatched(m, reread=False)  # zero-filled up to the next flavor
+
+    def test_unreferenced(self):
+        m = Model.open(self.path)
+        f11 = next(f for f in m.body.flavors.by_types(11).values() if len(f.children) > 1)
+        f11.values2.pop()
+        f11.values1[0] -= 1
+        m.save()  # values of the removed child are left
+        m = Model.open(self.path)
+        self.assertPatched(m)  # zero-filled like a full write
+        self.assertNotEqual(self._read(), self.data)
+
+    def test_trailing_data(self):
+        with open(self.path, 'ab') as f:
+            f.write(bytes(4))
+        m = Model.open(self.path)
+        self.assertPatched(m, False)
+
+    def test_removed(self):
+        m = Model.open(self.path)
+        del m.body.flavors[next(iter(m.body.flavors.by_types(14)))]
+        self.assertPatched(m, False)
+
+    def test_modified_file(self):
+        m = Model.open(self.path)
+        self._edit(m)
+        with open(self.path, 'r+b') as f:
+            f.write(b'\xff')
+        self.assertPatched(m, False)
+
+    def test_other_path(self):
+        m = Model.open(self.path)
+        other_path = os.path.join(self._dir.name, 'other.3do')
+        self.assertFalse(m.save(other_path, patch=True))
+        self._edit(m)
+        self.assertTrue(m.save(other_path, patch=True))  # synced to the saved file
+        self.assertEqual(self._read(other_path), m.to_bytes())
+        self.assertEqual(self._read(), self.data)
+
+    def test_sorted(self):
+        m = Model.open(self.path)
+        m.sort()
+        self.assertPatched(m, False)
+
+    def test_lazy_mmap_full_write(self):
+        m = Model.open(self.path, mmap=True, lazy=True)
+        m.save()  # the mapped file is truncated
+        self.assertEqual(self._read(), self.data)
+        self.assertEqual(m.to_bytes(), self.data)
+
+
+@skip_unless_long32
+class WriteTest(unittest.TestCase):
+    def test_size(self):
+        m = build_object()
+        st = BytesIO()
+        with Profiler() as prof:
+            size = m.write(st)
+        self.assertEqual(st.getvalue(), m.to_bytes())
+        self.assertEqual(size, len(st.getvalue()))
+        self.assertEqual(prof.bytes_written, size)
+        self.assertEqual(m.header.write(BytesIO()), len(m.header.to_bytes()))
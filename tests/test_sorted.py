@@ -0,0 +1,24 @@
+# coding: utf-8
+import unittest
+
+from .models import build_twins, skip_unless_long32
+
+
+@skip_unless_long32
+class MergeSubgraphsTest(unittest.TestCase):
+    def setUp(self):
+        self.m = build_twins()
+
+    def test_merged(self):
+        flavors_only = self.m.sorted(True)
+        merged = self.m.sorted(True, merge_subgraphs=True)
+        self.assertLess(len(merged.body.flavors), len(flavors_only.body.flavors))
+        saving = self.m.body.flavors.subgraph_saving()
+        self.assertGreater(saving, 0)
+        self.assertEqual(len(merged.to_bytes()), len(flavors_only.to_bytes()) - saving)
+        root_list = merged.body.flavors[merged.body.flavors[merged.header.root_offset].values1[0]]
+        self.assertEqual(len(set(root_list.children)), 1)  # both sections are the same
+
+    def test_no_diff(self):
+        for m in (self.m.sorted(True), self.m.sorted(True, merge_subgraphs=True)):
+            self.assertFalse(self.m.body.flavors.diff(m.body.flavors))
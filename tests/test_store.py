@@ -0,0 +1,46 @@
+# coding: utf-8
+import os
+import pickle
+import unittest
+from tempfile import TemporaryDirectory
+
+from icr2model.flavor.flavor import F00, VertexFlavor
+from icr2model.model import Model
+
+from .models import skip_unless_long32, write_object
+
+try:
+    import numpy
+except ImportError:  # optional
+    numpy = None
+
+
+@skip_unless_long32
+@unittest.skipIf(numpy is None, 'requires numpy')
+class VertexViewTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'model.3do')
+        self.data = write_object(self.path)
+        self.m = Model.open(self.path, vertex_store=True)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_isinstance(self):
+        vertices = self.m.body.flavors.by_types(0)
+        self.assertTrue(vertices)
+        for f in vertices.values():
+            self.assertIsInstance(f, VertexFlavor)
+            self.assertIsInstance(f, F00)
+        self.assertEqual(self.m.to_bytes(), self.data)
+
+    def test_pickle(self):
+        m = pickle.loads(pickle.dumps(self.m))
+        self.assertEqual(m.to_bytes(), self.data)
+
+    def test_edit(self):
+        f = next(iter(self.m.body.flavors.by_types(0).values()))
+        f.values1[2] += 1
+        self.assertIn(f.offset, self.m.body.flavors.dirty)
+        self.assertEqual(f.values1[2], Model.open(self.path).body.flavors[f.offset].values1[2] + 1)
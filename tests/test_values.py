@@ -0,0 +1,31 @@
+# coding: utf-8
+import unittest
+
+from icr2model.flavor import build_flavor
+
+
+class ValuesListTest(unittest.TestCase):
+    def setUp(self):
+        self.f = build_flavor(15, 0, values1=[1, 2, 3, 4, 5, 6, 7])
+        self.f.length  # cached
+
+    def test_slice_assignment(self):
+        self.f.values1[0:3] = [4, 5, 6]
+        self.assertEqual(self.f.values1.tolist(), [4, 5, 6, 4, 5, 6, 7])
+
+    def test_compare(self):
+        self.assertEqual(self.f.values1, [1, 2, 3, 4, 5, 6, 7])
+        self.assertNotEqual(self.f.values1, [1])
+        self.assertEqual(self.f.values1, build_flavor(15, 0, values1=range(1, 8)).values1)
+
+    def test_concatenate(self):
+        self.assertEqual(self.f.values1 + [8], list(range(1, 9)))
+        self.assertEqual([0] + self.f.values1, list(range(8)))
+
+    def test_changes_notified(self):
+        f11 = build_flavor(11, 0, values1=[1], values2=[8])
+        self.assertEqual(f11.length, 12)
+        f11.values2 += [12]
+        f11.values1[:] = [2]
+        self.assertEqual(f11.values2, [8, 12])
+        self.assertEqual(f11.length, 16)